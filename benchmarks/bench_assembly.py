@@ -0,0 +1,48 @@
+"""Measures memory allocated while the stub tree of a file with many top-level messages and enums is assembled
+
+   Run as `python -m benchmarks.bench_assembly` from the repository root.
+"""
+import time
+import tracemalloc
+
+from stubs_generator.generator import DEFAULT_TAB_STR, generate_pb2_stub_file
+from stubs_generator.symbols import SymbolTable
+
+from .synthetic import make_flat_proto_file
+
+MESSAGES = 50000
+ENUMS = 5000
+VALUES = 20
+RUNS = 3
+
+
+def main():
+    proto_file = make_flat_proto_file(MESSAGES, ENUMS, VALUES)
+    symbols = SymbolTable([proto_file])
+    comments = {}
+    print("{} messages, {} enums of {} values".format(MESSAGES, ENUMS, VALUES))
+
+    assembly, rendering = [], []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        stub = generate_pb2_stub_file(proto_file, symbols, comments)
+        assembled = time.perf_counter()
+        stub.generate(0, DEFAULT_TAB_STR)
+        assembly.append(assembled - start)
+        rendering.append(time.perf_counter() - assembled)
+    print("time: assembly {:.3f} s, rendering {:.3f} s (best of {} runs)".format(min(assembly), min(rendering),
+                                                                                   RUNS))
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    stub = generate_pb2_stub_file(proto_file, symbols, comments)
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # everything above the size of the tree was allocated only temporarily
+    print("assembly: peak {:.1f} MiB, tree {:.1f} MiB, temporary {:.1f} MiB".format(
+        (peak - before) / 1024 / 1024, (size - before) / 1024 / 1024, (peak - size) / 1024 / 1024))
+    del stub
+
+
+if __name__ == '__main__':
+    main()
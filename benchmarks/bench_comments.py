@@ -0,0 +1,27 @@
+"""Measures how building of the comment index scales with count of locations in a proto file
+
+   Run as `python -m benchmarks.bench_comments` from the repository root.
+"""
+import time
+
+from stubs_generator.comments import CommentIndex
+
+from .synthetic import make_proto_file
+
+SIZES = ((100, 10), (100, 100), (1000, 100), (100, 1000), (2000, 200))
+
+
+def main():
+    print("{:>9} {:>7} {:>10} {:>10} {:>14}".format("messages", "fields", "locations", "time [s]", "ns / location"))
+    for messages, fields in SIZES:
+        pf = make_proto_file(messages, fields)
+        locations = len(pf.source_code_info.location)
+        start = time.perf_counter()
+        CommentIndex(pf)
+        elapsed = time.perf_counter() - start
+        print("{:>9} {:>7} {:>10} {:>10.4f} {:>14.0f}".format(
+            messages, fields, locations, elapsed, elapsed / locations * 1e9))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Compares size of generated stubs and time of their type checking by mypy with and without `compact` parameter
+
+   Run as `python -m benchmarks.bench_compact` from the repository root, type checking is skipped when mypy is
+   not installed.
+"""
+import os
+import tempfile
+
+from .bench_mypy import FILES, MESSAGES, RUNS, check, write_stubs
+
+
+def measure(parameter: str, type_check: bool):
+    with tempfile.TemporaryDirectory() as out_dir:
+        names = write_stubs(out_dir, parameter)
+        size = sum(os.path.getsize(os.path.join(out_dir, name)) for name in names if name.endswith('_pb2.pyi'))
+        if not type_check:
+            return size, None, None
+        results = [check(out_dir, names) for _ in range(RUNS)]
+    return size, min(elapsed for elapsed, _ in results), results[0][1]
+
+
+def main():
+    try:
+        import mypy  # noqa: F401
+        type_check = True
+    except ImportError:
+        print("mypy is not installed, only size of stubs is measured")
+        type_check = False
+    print("{} files, {} messages".format(FILES, FILES * MESSAGES))
+    print("{:>10} {:>14} {:>10} {:>8}".format("stubs", "_pb2.pyi [kB]", "mypy [s]", "errors"))
+    results = {}
+    for label, parameter in (("full", ""), ("compact", "compact")):
+        size, elapsed, errors = results[label] = measure(parameter, type_check)
+        print("{:>10} {:>14.0f} {:>10} {:>8}".format(label, size / 1024,
+                                                       "-" if elapsed is None else "{:.3f}".format(elapsed),
+                                                       "-" if errors is None else errors))
+    print("size: {:.1f}x smaller".format(results["full"][0] / results["compact"][0]))
+    if type_check:
+        print("mypy: {:.2f}x faster".format(results["full"][1] / results["compact"][1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Measures latency of a plugin invocation with and without the generator daemon
+
+   Run as `python -m benchmarks.bench_daemon` from the repository root.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from stubs_generator.client import SOCKET_ENV, request_daemon
+
+from .synthetic import make_request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLUGIN = os.path.join(ROOT, 'protoc-gen-python_all_typings')
+INVOCATIONS = 20
+CONCURRENT_CLIENTS = 8
+
+
+def invoke(data: bytes, socket_path: str) -> bytes:
+    return subprocess.run([sys.executable, PLUGIN], input=data, stdout=subprocess.PIPE, check=True, cwd=ROOT,
+                          env=dict(os.environ, **{SOCKET_ENV: socket_path})).stdout
+
+
+def measure(data: bytes, socket_path: str) -> float:
+    start = time.perf_counter()
+    for _ in range(INVOCATIONS):
+        invoke(data, socket_path)
+    return (time.perf_counter() - start) / INVOCATIONS
+
+
+def wait_for_daemon(socket_path: str):
+    for _ in range(100):
+        if request_daemon('both', b"", socket_path) is not None:
+            return
+        time.sleep(0.1)
+    raise RuntimeError("daemon did not start")
+
+
+def main():
+    data = make_request(1, 20, 20).SerializeToString()
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, 'daemon.sock')
+        in_process = measure(data, socket_path)
+        expected = invoke(data, socket_path)
+
+        daemon = subprocess.Popen([sys.executable, '-m', 'stubs_generator.daemon', '--socket', socket_path],
+                                  cwd=ROOT, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_daemon(socket_path)
+            with_daemon = measure(data, socket_path)
+            with ThreadPoolExecutor(CONCURRENT_CLIENTS) as executor:
+                outputs = list(executor.map(lambda _: invoke(data, socket_path), range(CONCURRENT_CLIENTS * 4)))
+            assert all(output == expected for output in outputs), "daemon changed the output"
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+    print("{:>12} {:>14}".format("mode", "latency [ms]"))
+    print("{:>12} {:>14.1f}".format("in-process", in_process * 1000))
+    print("{:>12} {:>14.1f}".format("daemon", with_daemon * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Measures memory taken by the stub tree of a big proto file and peak memory of generation of its stub
+
+   Run as `python -m benchmarks.bench_memory [FIELDS]` from the repository root.
+"""
+import sys
+import tracemalloc
+
+from stubs_generator.generator import generate_message_stub, generate_pb2_stub_file_content
+from stubs_generator.symbols import SymbolTable, proto_module
+from stubs_generator.utils import ImportPool, get_comments
+
+from .synthetic import make_proto_file
+
+FIELDS_PER_MESSAGE = 100
+
+
+def tree_size(proto_file, symbols, comments) -> int:
+    """Returns size of memory allocated by nodes of messages which stay alive"""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    messages = [generate_message_stub(symbols, proto_module(proto_file.name), ImportPool(), comments, msg)
+                for msg in proto_file.message_type]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del messages
+    return after - before
+
+
+def generation_peak(proto_file, symbols, comments) -> int:
+    """Returns peak of memory allocated during generation of the stub, not counting its inputs"""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    content = generate_pb2_stub_file_content(proto_file, symbols, comments)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del content
+    return peak - before
+
+
+def main():
+    fields = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    proto_file = make_proto_file(fields // FIELDS_PER_MESSAGE, FIELDS_PER_MESSAGE)
+    symbols = SymbolTable([proto_file])
+    comments = get_comments(proto_file)
+    print("{} messages, {} fields".format(len(proto_file.message_type), fields))
+    size = tree_size(proto_file, symbols, comments)
+    print("stub tree:        {:8.1f} MiB, {:5.0f} B per field".format(size / 1024 / 1024, size / fields))
+    peak = generation_peak(proto_file, symbols, comments)
+    print("generation peak:  {:8.1f} MiB, {:5.0f} B per field".format(peak / 1024 / 1024, peak / fields))
+
+
+if __name__ == '__main__':
+    main()
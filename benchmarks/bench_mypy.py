@@ -0,0 +1,64 @@
+"""Measures how long mypy takes to check generated stubs of a request with many files importing each other
+
+   Run as `python -m benchmarks.bench_mypy` from the repository root, the benchmark is skipped when mypy is
+   not installed. Run it from a checkout of another revision to compare the generated imports.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+from stubs_generator.plugin import generate
+
+from .synthetic import make_request
+
+FILES = 100
+MESSAGES = 50
+FIELDS = 10
+RUNS = 3
+
+
+def write_stubs(out_dir: str, parameter: str = "") -> List[str]:
+    response = generate(make_request(FILES, MESSAGES, FIELDS, parameter), 'both')
+    assert not response.error, response.error
+    for generated in response.file:
+        path = os.path.join(out_dir, generated.name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(generated.content)
+    return [generated.name for generated in response.file]
+
+
+def check(out_dir: str, names: List[str]) -> Tuple[float, int]:
+    """Runs mypy over the stubs, returns its wall time and count of reported errors"""
+    start = time.perf_counter()
+    # the stubs override methods of `Message` with signatures different from those in types-protobuf
+    result = subprocess.run([sys.executable, '-m', 'mypy', '--no-incremental', '--ignore-missing-imports',
+                             '--implicit-optional', '--disable-error-code', 'override',
+                             '--namespace-packages', '--explicit-package-bases', *names],
+                            cwd=out_dir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+    elapsed = time.perf_counter() - start
+    # exit code 1 means type errors were found, the time of checking is measured anyway
+    assert result.returncode in (0, 1), result.stdout
+    return elapsed, result.stdout.count(": error: ")
+
+
+def main():
+    try:
+        import mypy  # noqa: F401
+    except ImportError:
+        print("mypy is not installed, skipping")
+        return
+    with tempfile.TemporaryDirectory() as out_dir:
+        names = write_stubs(out_dir)
+        print("{} stub files, {} messages".format(len(names), FILES * MESSAGES))
+        results = [check(out_dir, names) for _ in range(RUNS)]
+    times = [elapsed for elapsed, _ in results]
+    print("mypy reported {} errors".format(results[0][1]))
+    print("mypy: best {:.3f} s, mean {:.3f} s of {} runs".format(min(times), sum(times) / len(times), RUNS))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""Microbenchmarks of rendering of single node classes of stubs and decoding of field types
+
+   Every case renders one node (or decodes one type) repeatedly. Reported are time per call, peak of memory
+   allocated during a call and blocks and bytes allocated by a call which stay alive (its result), traced
+   by `tracemalloc` in separate runs so tracing does not skew the times. When a render path regresses, the case
+   of its node class shows it, `--top N` lists lines of the generator which allocated the most in every case.
+
+   Run as `python -m benchmarks.bench_nodes [--case NAME...] [--top N] [--out RESULTS.json]`
+   from the repository root.
+"""
+import argparse
+import json
+import os
+import random
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from google.protobuf.descriptor import FieldDescriptor
+
+from stubs_generator.fields import MessageType, SimpleType
+from stubs_generator.messages import Constructor, ConstructorParameter, FieldComment, Import, Message
+from stubs_generator.servicers import AbstractMethod, StubMethod, _Comments
+from stubs_generator.symbols import SymbolTable
+from stubs_generator.utils import ImportPool, decode_type
+
+from .descriptors import random_comment
+from .synthetic import make_request
+
+TAB = '    '
+PARAMETERS = 200
+COMMENT_LINES = 20
+NESTING = 20
+MODULES = 100
+NAMES_PER_MODULE = 5
+# allocations of a call are traced over this many calls, so those of fast nodes are not lost in rounding
+TRACED_CALLS = 100
+GENERATOR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'stubs_generator')
+
+
+def _comment(lines: int) -> List[str]:
+    return random_comment(random.Random(lines), lines).splitlines()
+
+
+def constructor_case() -> Callable:
+    node = Constructor([ConstructorParameter(SimpleType("int", repeated=bool(i % 2)), "field{}".format(i),
+                                             [" Field {}".format(i)])
+                        for i in range(PARAMETERS)])
+    return lambda: node.generate(1, TAB)
+
+
+def field_comment_case() -> Callable:
+    node = FieldComment("field", _comment(COMMENT_LINES))
+    return lambda: node.generate(2, TAB)
+
+
+def method_comments_case() -> Callable:
+    node = _Comments(_comment(COMMENT_LINES))
+    return lambda: node.generate(2, TAB)
+
+
+def message_nesting_case() -> Callable:
+    node = None
+    for level in reversed(range(NESTING)):
+        parents = ["Level{}".format(i) for i in range(level)]
+        inner = [Constructor([ConstructorParameter(SimpleType("str", repeated=False), "value", [" Value"])])]
+        if node is not None:
+            inner.insert(0, node)
+        node = Message("Level{}".format(level), parents, inner)
+    return lambda: node.generate(0, TAB)
+
+
+def import_pool_case() -> Callable:
+    pool = ImportPool()
+    for m in range(MODULES):
+        pool.add(Import("package/module{}.proto".format(m), ["Name{}".format(n) for n in range(NAMES_PER_MODULE)]))
+        pool.add(Import("package.module{}".format(m)))
+    return lambda: pool.generate(0, TAB)
+
+
+def stub_method_case() -> Callable:
+    node = StubMethod("Method", MessageType("Request", repeated=False), MessageType("Response", repeated=False),
+                      _comment(3))
+    return lambda: node.generate(1, TAB)
+
+
+def abstract_method_case() -> Callable:
+    node = AbstractMethod("Method", MessageType("Request", repeated=False), MessageType("Response", repeated=False),
+                          _comment(3))
+    return lambda: node.generate(1, TAB)
+
+
+def decode_type_case() -> Callable:
+    request = make_request(2, 10, 1)
+    symbols = SymbolTable(request.proto_file)
+    pool = ImportPool()
+    # message of other module is imported, the most expensive path
+    return lambda: decode_type(FieldDescriptor.TYPE_MESSAGE, ".synthetic.file0.Message3", False, pool,
+                               "synthetic.file1_pb2", symbols=symbols, scope="")
+
+
+# name -> (measured node class, builder of the measured call)
+CASES: Dict[str, Tuple[str, Callable[[], Callable]]] = {
+    'constructor': ('Constructor', constructor_case),
+    'field_comment': ('FieldComment', field_comment_case),
+    'method_comments': ('_Comments', method_comments_case),
+    'message_nesting': ('Message', message_nesting_case),
+    'import_pool': ('ImportPool', import_pool_case),
+    'stub_method': ('StubMethod', stub_method_case),
+    'abstract_method': ('AbstractMethod', abstract_method_case),
+    'decode_type': ('decode_type', decode_type_case),
+}
+
+
+def measure_time(call: Callable) -> float:
+    """Returns the best time of a call"""
+    timer = timeit.Timer(call)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=3, number=number)) / number
+
+
+def measure_memory(call: Callable, top: int):
+    """Returns peak of memory allocated during a call, blocks and bytes allocated by a call which stay alive,
+       and `top` lines of the generator which allocated the most of them
+    """
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    result = call()
+    _, peak = tracemalloc.get_traced_memory()
+    del result
+
+    snapshot = tracemalloc.take_snapshot()
+    results = [call() for _ in range(TRACED_CALLS)]
+    statistics = tracemalloc.take_snapshot().compare_to(snapshot, 'lineno')
+    tracemalloc.stop()
+    del results
+
+    # the list holding results is allocated by this function, it is not counted
+    statistics = [s for s in statistics if s.traceback[0].filename != __file__]
+    blocks = sum(s.count_diff for s in statistics) / TRACED_CALLS
+    size = sum(s.size_diff for s in statistics) / TRACED_CALLS
+    sites = [("{}:{}".format(os.path.relpath(s.traceback[0].filename, GENERATOR_DIR), s.traceback[0].lineno),
+              s.size_diff / TRACED_CALLS)
+             for s in statistics if s.traceback[0].filename.startswith(GENERATOR_DIR) and s.size_diff > 0][:top]
+    return peak - before, blocks, size, sites
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--case', action='append', choices=list(CASES),
+                        help="run only this case, can be repeated (default: all)")
+    parser.add_argument('--top', type=int, default=0, help="list lines allocating the most in every case")
+    parser.add_argument('--out', help="write results into this JSON file")
+    args = parser.parse_args()
+
+    print("{:<16} {:<15} {:>12} {:>12} {:>10} {:>12}".format(
+        "case", "node", "time [us]", "peak [B]", "blocks", "bytes"))
+    results = []
+    for name in args.case or CASES:
+        node, build = CASES[name]
+        call = build()
+        # caches of templates and imports are filled by the first call, like in a real run
+        call()
+        elapsed = measure_time(call)
+        peak, blocks, size, sites = measure_memory(call, args.top)
+        print("{:<16} {:<15} {:>12.2f} {:>12} {:>10.1f} {:>12.0f}".format(
+            name, node, elapsed * 1e6, peak, blocks, size))
+        for site, site_size in sites:
+            print("    {:<40} {:>10.0f} B".format(site, site_size))
+        results.append({'case': name, 'node': node, 'time': elapsed, 'peak_bytes': peak, 'blocks': blocks,
+                        'bytes': size, 'sites': sites})
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == '__main__':
+    main()
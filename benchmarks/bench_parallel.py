@@ -0,0 +1,40 @@
+"""Compares serial generation of a request with many files and generation on a process pool
+
+   Run as `python -m benchmarks.bench_parallel [JOBS]` from the repository root.
+"""
+import os
+import sys
+import time
+
+from stubs_generator.plugin import generate
+
+from .synthetic import make_request
+
+FILES = 200
+MESSAGES = 20
+FIELDS = 20
+
+
+def measure(jobs: int):
+    request = make_request(FILES, MESSAGES, FIELDS, parameter="jobs={}".format(jobs))
+    start = time.perf_counter()
+    response = generate(request, 'both')
+    elapsed = time.perf_counter() - start
+    assert not response.error, response.error
+    return elapsed, response
+
+
+def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    print("{} files, {} messages, {} fields".format(FILES, FILES * MESSAGES, FILES * MESSAGES * FIELDS))
+    serial, serial_response = measure(1)
+    parallel, parallel_response = measure(jobs)
+    assert serial_response == parallel_response, "parallel generation changed the output"
+    print("{:>8} {:>10}".format("jobs", "time [s]"))
+    print("{:>8} {:>10.3f}".format(1, serial))
+    print("{:>8} {:>10.3f}".format(jobs, parallel))
+    print("speedup: {:.2f}x".format(serial / parallel))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Compares rendering of a stub with 50k fields into a string (`generate`)
+   and streaming of it straight into a file (`write`)
+
+   Run as `python -m benchmarks.bench_render` from the repository root.
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+
+from .synthetic import make_stub_tree
+
+MESSAGES = 500
+FIELDS = 100
+TAB = '    '
+
+
+def render_to_string(tree, path):
+    with open(path, 'w') as f:
+        f.write(tree.generate(0, TAB))
+
+
+def render_to_file(tree, path):
+    with open(path, 'w') as f:
+        tree.write(f, 0, TAB)
+
+
+def measure(render, tree, path):
+    start = time.perf_counter()
+    render(tree, path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    render(tree, path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    tree = make_stub_tree(MESSAGES, FIELDS)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_pb2.pyi")
+        print("{} messages, {} fields".format(MESSAGES, MESSAGES * FIELDS))
+        print("{:>10} {:>10} {:>14}".format("mode", "time [s]", "peak [KiB]"))
+        for name, render in (("generate", render_to_string), ("write", render_to_file)):
+            elapsed, peak = measure(render, tree, path)
+            print("{:>10} {:>10.4f} {:>14.0f}".format(name, elapsed, peak / 1024))
+        print("output size: {:.0f} KiB".format(os.path.getsize(path) / 1024))
+
+
+if __name__ == '__main__':
+    main()
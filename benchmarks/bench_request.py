@@ -0,0 +1,64 @@
+"""Compares full parsing of a request with a big closure of imported files and its lazy scanning,
+   which parses only the generated file, and checks that both generate the same response
+
+   Run as `python -m benchmarks.bench_request` from the repository root.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+from google.protobuf.compiler import plugin_pb2
+
+from stubs_generator.plugin import generate
+from stubs_generator.request import scan_request
+
+from .synthetic import make_request
+
+FILES = 300
+MESSAGES = 30
+FIELDS = 30
+
+# Parses the request in a new process and generates its stubs, prints time of parsing and peak RSS in KiB
+CHILD = """
+import sys, time
+from google.protobuf.compiler import plugin_pb2
+from benchmarks.memory import peak_rss
+from stubs_generator.plugin import generate
+from stubs_generator.request import scan_request
+with open(sys.argv[2], 'rb') as f:
+    data = f.read()
+start = time.perf_counter()
+request = scan_request(data) if sys.argv[1] == 'scan' else plugin_pb2.CodeGeneratorRequest.FromString(data)
+parsed = time.perf_counter()
+generate(request, 'both')
+print(parsed - start, time.perf_counter() - start, peak_rss())
+"""
+
+
+def run(mode: str, path: str):
+    output = subprocess.check_output([sys.executable, '-c', CHILD, mode, path],
+                                     cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parsing, total, rss = output.split()
+    return float(parsing), float(total), int(rss)
+
+
+def main():
+    request = make_request(FILES, MESSAGES, FIELDS)
+    # only the last file is generated, all others are its imports
+    del request.file_to_generate[:-1]
+    data = request.SerializeToString()
+    assert generate(scan_request(data), 'both') == generate(request, 'both'), "scanned request changed the output"
+
+    print("{} files, request {:.1f} MiB, 1 file generated".format(FILES, len(data) / 1024 / 1024))
+    print("{:>8} {:>12} {:>12} {:>14}".format("mode", "parse [s]", "total [s]", "peak RSS [MiB]"))
+    with tempfile.NamedTemporaryFile() as f:
+        f.write(data)
+        f.flush()
+        for mode in ('full', 'scan'):
+            parsing, total, rss = run(mode, f.name)
+            print("{:>8} {:>12.3f} {:>12.3f} {:>14.1f}".format(mode, parsing, total, rss / 1024))
+
+
+if __name__ == '__main__':
+    main()
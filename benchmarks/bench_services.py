@@ -0,0 +1,34 @@
+"""Generates servicer stub of a service with many methods sharing a few message types
+
+   Run as `python -m benchmarks.bench_services [METHODS]` from the repository root.
+"""
+import sys
+import time
+
+from stubs_generator.generator import generate_pb2_grpc_stub_file_content
+from stubs_generator.symbols import SymbolTable
+
+from .synthetic import make_proto_file, make_service_proto_file
+
+TYPES = 5
+RUNS = 5
+
+
+def main():
+    methods = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    types_file = make_proto_file(TYPES, 1, name="synthetic/file0.proto")
+    types_file.package = "synthetic.file0"
+    proto_file = make_service_proto_file(methods, TYPES)
+    symbols = SymbolTable([types_file, proto_file])
+    comments = {}
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        generate_pb2_grpc_stub_file_content(proto_file, symbols, comments)
+        times.append(time.perf_counter() - start)
+    print("{} methods using {} message types".format(methods, TYPES))
+    print("best {:.3f} s, mean {:.3f} s of {} runs".format(min(times), sum(times) / len(times), RUNS))
+
+
+if __name__ == '__main__':
+    main()
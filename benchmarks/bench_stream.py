@@ -0,0 +1,51 @@
+"""Compares peak RSS of the plugin writing the whole response at once and streaming it file by file,
+   equality of both responses is checked by `tests/test_stream.py`
+
+   Run as `python -m benchmarks.bench_stream` from the repository root.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+from google.protobuf.compiler import plugin_pb2
+
+from .synthetic import make_request
+
+FILES = 200
+MESSAGES = 40
+FIELDS = 20
+# Runs the plugin and prints its peak RSS in KiB to stderr
+PLUGIN = """
+import sys
+from benchmarks.memory import peak_rss
+from stubs_generator.plugin import main
+main('both')
+sys.stderr.write(str(peak_rss()))
+"""
+
+
+def run_plugin(request: plugin_pb2.CodeGeneratorRequest):
+    """Runs the plugin in a new process, returns its response and peak RSS in KiB"""
+    with tempfile.TemporaryFile() as out:
+        process = subprocess.Popen([sys.executable, '-c', PLUGIN], stdin=subprocess.PIPE, stdout=out,
+                                   stderr=subprocess.PIPE,
+                                   cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        _, rss = process.communicate(request.SerializeToString())
+        assert process.returncode == 0, rss
+        out.seek(0)
+        data = out.read()
+    return data, int(rss)
+
+
+def main():
+    request = make_request(FILES, MESSAGES, FIELDS)
+    whole, whole_rss = run_plugin(request)
+    request.parameter = "stream"
+    streamed, streamed_rss = run_plugin(request)
+    print("{} files, response {:.1f} MiB".format(FILES, len(whole) / 1024 / 1024))
+    print("peak RSS: whole response {:.1f} MiB, streamed {:.1f} MiB".format(whole_rss / 1024, streamed_rss / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Generates stubs of a proto file with deeply nested messages and of one with a huge message
+
+   Run as `python -m benchmarks.bench_traversal` from the repository root. The proto files are built in memory,
+   protobuf refuses to parse messages nested this deep.
+"""
+import sys
+import time
+import tracemalloc
+
+from stubs_generator.generator import generate_pb2_stub_file_content
+from stubs_generator.symbols import SymbolTable
+
+from .synthetic import make_nested_proto_file, make_proto_file
+
+DEPTH = 500
+FIELDS = 100000
+
+
+def measure(label: str, proto_file):
+    symbols = SymbolTable([proto_file])
+    start = time.perf_counter()
+    content = generate_pb2_stub_file_content(proto_file, symbols)
+    elapsed = time.perf_counter() - start
+    # tracing slows the generation down, so memory is measured by another run
+    tracemalloc.start()
+    generate_pb2_stub_file_content(proto_file, symbols)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("{:<24} {:>10.3f} {:>12.1f} {:>12.1f}".format(label, elapsed, peak / 1024 / 1024,
+                                                       len(content) / 1024 / 1024))
+    return content
+
+
+def main():
+    print("recursion limit: {}".format(sys.getrecursionlimit()))
+    print("{:<24} {:>10} {:>12} {:>12}".format("proto", "time [s]", "peak [MiB]", "stub [MiB]"))
+    content = measure("{} levels deep".format(DEPTH), make_nested_proto_file(DEPTH))
+    assert "class Level{}(Message):".format(DEPTH) in content
+    content = measure("{} fields".format(FIELDS), make_proto_file(1, FIELDS))
+    assert "self.field{} = field{}".format(FIELDS - 1, FIELDS - 1) in content
+
+
+if __name__ == '__main__':
+    main()
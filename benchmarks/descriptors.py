@@ -0,0 +1,114 @@
+import random
+from typing import List, Sequence
+
+from google.protobuf.compiler import plugin_pb2
+from google.protobuf.descriptor import FieldDescriptor
+from google.protobuf.descriptor_pb2 import DescriptorProto, FileDescriptorProto
+
+# Scalar types of random fields, message and enum fields are added when there are types to reference
+SCALAR_TYPES = (
+    FieldDescriptor.TYPE_DOUBLE, FieldDescriptor.TYPE_FLOAT, FieldDescriptor.TYPE_INT64, FieldDescriptor.TYPE_UINT64,
+    FieldDescriptor.TYPE_INT32, FieldDescriptor.TYPE_BOOL, FieldDescriptor.TYPE_STRING, FieldDescriptor.TYPE_BYTES,
+    FieldDescriptor.TYPE_UINT32, FieldDescriptor.TYPE_SINT64,
+)
+WORDS = ("the", "value", "of", "request", "is", "sent", "to", "service", "when", "a", "field", "message", "changes",
+         "and", "it", "must", "be", "unique", "within", "scope")
+
+# Deepest nesting that protobuf runtime still parses, upb refuses messages nested over 100 levels
+# and every nested message is two levels deeper in the serialized request
+MAX_NESTING = 48
+
+
+def random_comment(rng: random.Random, lines: int) -> str:
+    """Returns comment of `lines` lines of random words, as protoc stores it in `source_code_info`"""
+    return "".join(" {}\n".format(" ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12))))
+                   for _ in range(lines))
+
+
+def _add_comments(rng: random.Random, pf: FileDescriptorProto, path: List[int], lines: int):
+    if lines:
+        location = pf.source_code_info.location.add(path=path)
+        location.leading_comments = random_comment(rng, lines)
+        location.trailing_comments = random_comment(rng, 1)
+
+
+def _add_fields(rng: random.Random, pf: FileDescriptorProto, msg: DescriptorProto, path: List[int], fields: int,
+                messages: Sequence[str], enums: Sequence[str], comment_lines: int):
+    for f in range(rng.randint(1, fields)):
+        field = msg.field.add(name="field{}".format(f), number=f + 1, type=rng.choice(SCALAR_TYPES),
+                              label=rng.choice((FieldDescriptor.LABEL_OPTIONAL, FieldDescriptor.LABEL_REPEATED)))
+        kind = rng.random()
+        if messages and kind < 0.3:
+            field.type = FieldDescriptor.TYPE_MESSAGE
+            field.type_name = rng.choice(messages)
+        elif enums and kind < 0.4:
+            field.type = FieldDescriptor.TYPE_ENUM
+            field.type_name = rng.choice(enums)
+        _add_comments(rng, pf, path + [2, f], comment_lines)
+
+
+def random_proto_file(rng: random.Random, name: str, package: str, messages: int, fields: int = 8, enums: int = 0,
+                      values: int = 0, nesting: int = 0, methods: int = 0, comment_lines: int = 0,
+                      imported: Sequence[str] = ()) -> FileDescriptorProto:
+    """Builds proto file with `messages` top-level messages of up to `fields` fields and `enums` enums of `values`
+       values, each message has a chain of `nesting` nested messages and there is a service with `methods` methods
+       when it is not zero. Fields reference messages of the file and `imported` messages, every declaration has
+       a comment of `comment_lines` lines.
+    """
+    assert nesting <= MAX_NESTING, "protobuf can not parse messages nested over {} levels".format(MAX_NESTING)
+    pf = FileDescriptorProto(name=name, package=package, syntax="proto3")
+    prefix = "." + package + "."
+
+    enum_names = []
+    for e in range(enums):
+        enum = pf.enum_type.add(name="Enum{}".format(e))
+        _add_comments(rng, pf, [5, e], comment_lines)
+        for v in range(values):
+            enum.value.add(name="ENUM{}_VALUE{}".format(e, v), number=v)
+            _add_comments(rng, pf, [5, e, 2, v], comment_lines)
+        enum_names.append(prefix + enum.name)
+
+    # fields reference only messages declared before them, so references of the stubs do not go in cycles
+    message_names = list(imported)
+    for m in range(messages):
+        msg = pf.message_type.add(name="Message{}".format(m))
+        path = [4, m]
+        full_name = prefix + msg.name
+        _add_comments(rng, pf, path, comment_lines)
+        _add_fields(rng, pf, msg, path, fields, message_names, enum_names, comment_lines)
+        for level in range(1, nesting + 1):
+            msg = msg.nested_type.add(name="Level{}".format(level))
+            path = path + [3, 0]
+            full_name += "." + msg.name
+            _add_comments(rng, pf, path, comment_lines)
+            _add_fields(rng, pf, msg, path, fields, message_names, enum_names, comment_lines)
+            message_names.append(full_name)
+        message_names.append(prefix + "Message{}".format(m))
+
+    if methods:
+        service = pf.service.add(name="Service")
+        _add_comments(rng, pf, [6, 0], comment_lines)
+        for m in range(methods):
+            service.method.add(name="Method{}".format(m), input_type=rng.choice(message_names),
+                               output_type=rng.choice(message_names),
+                               client_streaming=rng.random() < 0.1, server_streaming=rng.random() < 0.1)
+            _add_comments(rng, pf, [6, 0, 2, m], comment_lines)
+    return pf
+
+
+def random_request(seed: int, files: int, parameter: str = "", **shape) -> plugin_pb2.CodeGeneratorRequest:
+    """Builds request for generation of `files` proto files of the `shape` (see `random_proto_file`), every file
+       imports the previous one and references its messages, the same `seed` builds the same request
+    """
+    rng = random.Random(seed)
+    request = plugin_pb2.CodeGeneratorRequest(parameter=parameter)
+    imported = []
+    for i in range(files):
+        pf = random_proto_file(rng, "synthetic/random{}.proto".format(i), "synthetic.random{}".format(i),
+                               imported=imported, **shape)
+        if i:
+            pf.dependency.append(request.proto_file[-1].name)
+        request.proto_file.append(pf)
+        request.file_to_generate.append(pf.name)
+        imported = [".{}.{}".format(pf.package, msg.name) for msg in pf.message_type]
+    return request
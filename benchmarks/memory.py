@@ -0,0 +1,17 @@
+import resource
+
+
+def peak_rss() -> int:
+    """Returns peak resident set size of this process in KiB
+
+       `VmHWM` of Linux is preferred, `ru_maxrss` of a process spawned by a big process starts at the size of its
+       parent, because the high-water mark of the replaced address space is kept by exec.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
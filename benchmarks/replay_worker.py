@@ -0,0 +1,137 @@
+"""Replays recorded work requests against the persistent worker and checks its responses
+
+   Recording is a file of length delimited `WorkRequest`s, the same what Bazel writes to stdin of a worker.
+   Paths in requests are relative to the directory of the recording; the worker runs in a temporary copy of it.
+   Output directory of every request is emptied before it, stubs written by the worker must be the same
+   as those generated in this process from the descriptor sets of the request.
+
+   Record a request:  `python -m benchmarks.replay_worker record RECORDING ARGUMENT...`
+   Replay recording:  `python -m benchmarks.replay_worker replay RECORDING`
+"""
+import argparse
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from typing import Dict, List
+
+from google.protobuf.descriptor_pb2 import FileDescriptorSet
+
+from stubs_generator.plugin import generate_file, get_targets, parse_parameter
+from stubs_generator.symbols import SymbolTable
+from stubs_generator.wire import read_delimited, write_delimited
+from stubs_generator.worker import decode_work_request, decode_work_response, encode_work_request, parse_arguments
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def record(recording: str, arguments):
+    with open(recording, 'ab') as f:
+        write_delimited(f, encode_work_request(arguments))
+
+
+def read_recording(recording: str):
+    with open(recording, 'rb') as f:
+        stream = io.BytesIO(f.read())
+    requests = []
+    while True:
+        data = read_delimited(stream)
+        if data is None:
+            return requests
+        requests.append(data)
+
+
+def expected_stubs(arguments: List[str], directory: str) -> Dict[str, str]:
+    """Generates stubs of the work request in this process, paths of the request are relative to `directory`"""
+    args = parse_arguments(arguments)
+    proto_files = {}
+    for paths in args.descriptor_set_in:
+        for path in paths.split(':'):
+            if path:
+                with open(os.path.join(directory, path), 'rb') as f:
+                    for proto_file in FileDescriptorSet.FromString(f.read()).file:
+                        proto_files.setdefault(proto_file.name, proto_file)
+    symbols = SymbolTable(proto_files.values())
+    targets = get_targets(parse_parameter(args.parameter), 'both')
+    return {name: content for file_name in args.files
+            for name, content in generate_file(proto_files[file_name], symbols, targets)}
+
+
+def written_stubs(out: str) -> Dict[str, str]:
+    stubs = {}
+    for directory, _, file_names in os.walk(out):
+        for file_name in file_names:
+            path = os.path.join(directory, file_name)
+            with open(path, encoding='utf-8') as f:
+                stubs[os.path.relpath(path, out).replace(os.sep, '/')] = f.read()
+    return stubs
+
+
+def check_stubs(arguments: List[str], directory: str) -> List[str]:
+    """Returns differences of stubs written by the worker from the expected ones"""
+    written = written_stubs(os.path.join(directory, parse_arguments(arguments).out))
+    expected = expected_stubs(arguments, directory)
+    problems = ["{} not written".format(name) for name in sorted(expected.keys() - written.keys())]
+    problems += ["{} not expected".format(name) for name in sorted(written.keys() - expected.keys())]
+    problems += ["{} differs".format(name) for name in sorted(expected.keys() & written.keys())
+                 if written[name] != expected[name]]
+    return problems
+
+
+def replay(recording: str) -> bool:
+    requests = read_recording(recording)
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        sandbox = os.path.join(tmp, 'sandbox')
+        shutil.copytree(os.path.dirname(os.path.abspath(recording)), sandbox)
+        worker = subprocess.Popen([sys.executable, '-m', 'stubs_generator.worker', '--persistent_worker'],
+                                  cwd=sandbox, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                  env=dict(os.environ, PYTHONPATH=ROOT))
+        try:
+            for i, data in enumerate(requests):
+                request = decode_work_request(data)
+                shutil.rmtree(os.path.join(sandbox, parse_arguments(request.arguments).out), ignore_errors=True)
+                start = time.perf_counter()
+                write_delimited(worker.stdin, data)
+                worker.stdin.flush()
+                response = read_delimited(worker.stdout)
+                elapsed = time.perf_counter() - start
+                if response is None:
+                    print("request {}: worker exited".format(i))
+                    return False
+                exit_code, output, request_id = decode_work_response(response)
+                problems = check_stubs(request.arguments, sandbox) if exit_code == 0 else []
+                ok = ok and exit_code == 0 and request_id == request.request_id and not problems
+                print("request {}: exit code {}, {:.1f} ms, {}".format(
+                    i, exit_code, elapsed * 1000, " ".join(request.arguments)))
+                if output:
+                    print(output)
+                for problem in problems:
+                    print("    {}".format(problem))
+        finally:
+            worker.stdin.close()
+            worker.wait()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    record_parser = subparsers.add_parser('record')
+    record_parser.add_argument('recording')
+    record_parser.add_argument('arguments', nargs=argparse.REMAINDER)
+    replay_parser = subparsers.add_parser('replay')
+    replay_parser.add_argument('recording')
+    args = parser.parse_args()
+    if args.command == 'record':
+        record(args.recording, args.arguments)
+    elif not replay(args.recording):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+"""End-to-end benchmark of both plugins on recorded and synthetic requests
+
+   Each fixture is run by both plugin entry points in this process and as a subprocess of the plugin script,
+   the same as protoc runs it. Reported are wall time, throughput in fields of the generated files and bytes
+   of the response per second, and peak RSS of the subprocess. Synthetic requests are built by a seeded
+   generator (see `benchmarks.descriptors`), so the same fixture is the same request in every run.
+
+   Run the suite:    `python -m benchmarks.suite run [--fixture NAME...] [--runs N] [--out RESULTS.json]`
+   Compare results:  `python -m benchmarks.suite compare BASELINE.json RESULTS.json [--time-tolerance 0.1]`
+
+   Compare exits with status 1 when a result is slower or takes more memory than the baseline over the tolerance.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Iterator, List, Optional
+
+from google.protobuf import __version__ as protobuf_version
+from google.protobuf.compiler import plugin_pb2
+
+from stubs_generator import __version__
+from stubs_generator.client import SOCKET_ENV
+from stubs_generator.plugin import generate_serialized
+
+from .descriptors import MAX_NESTING, random_request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Requests recorded from protoc, file names are relative to `FIXTURES_DIR`
+RECORDED = {
+    'application': 'application.request.bin',
+}
+# Arguments of `random_request` of synthetic requests
+SYNTHETIC = {
+    'messages_10k': dict(seed=1, files=10, messages=1000, fields=8, methods=100),
+    'deep_nesting': dict(seed=2, files=2, messages=40, fields=4, nesting=MAX_NESTING),
+    'huge_enums': dict(seed=3, files=1, messages=20, fields=4, enums=20, values=5000),
+    'services_1k': dict(seed=4, files=2, messages=200, fields=4, methods=1000),
+    'long_comments': dict(seed=5, files=4, messages=250, fields=8, comment_lines=20),
+}
+FIXTURES = list(RECORDED) + list(SYNTHETIC)
+
+# Plugin scripts by the target they generate by default
+ENTRY_POINTS = {
+    'messages': 'protoc-gen-python_typings',
+    'grpc': 'protoc-gen-python_grpc_typings',
+}
+MODES = ('in-process', 'subprocess')
+
+# Runs the plugin script and prints its peak RSS in KiB to stderr
+PLUGIN = """
+import runpy, sys
+from benchmarks.memory import peak_rss
+runpy.run_path(sys.argv[1], run_name='__main__')
+sys.stdout.flush()
+sys.stderr.write(str(peak_rss()))
+"""
+
+
+def load_fixture(name: str) -> bytes:
+    """Returns serialized request of the fixture"""
+    if name in RECORDED:
+        with open(os.path.join(FIXTURES_DIR, RECORDED[name]), 'rb') as f:
+            return f.read()
+    return random_request(**SYNTHETIC[name]).SerializeToString()
+
+
+def count_fields(request: plugin_pb2.CodeGeneratorRequest) -> int:
+    """Counts fields of all messages, nested ones included, in files which are generated"""
+    generated = set(request.file_to_generate)
+    messages = [msg for pf in request.proto_file if pf.name in generated for msg in pf.message_type]
+    count = 0
+    while messages:
+        msg = messages.pop()
+        count += len(msg.field)
+        messages.extend(msg.nested_type)
+    return count
+
+
+def run_in_process(data: bytes, target: str):
+    """Generates the response in this process, returns it with its wall time, peak RSS is not known"""
+    start = time.perf_counter()
+    response = generate_serialized(data, target)
+    return response, time.perf_counter() - start, None
+
+
+def run_subprocess(data: bytes, target: str, env: Dict[str, str]):
+    """Runs the plugin script in a new process, returns its response, wall time and peak RSS in KiB"""
+    with tempfile.TemporaryFile() as out:
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, '-c', PLUGIN, os.path.join(ROOT, ENTRY_POINTS[target])],
+                                   stdin=subprocess.PIPE, stdout=out, stderr=subprocess.PIPE, cwd=ROOT, env=env)
+        _, rss = process.communicate(data)
+        elapsed = time.perf_counter() - start
+        assert process.returncode == 0, rss
+        out.seek(0)
+        return out.read(), elapsed, int(rss)
+
+
+def run_fixture(name: str, runs: int) -> Iterator[dict]:
+    """Yields results of every entry point and mode on the fixture, the best of `runs` runs is reported"""
+    data = load_fixture(name)
+    fields = count_fields(plugin_pb2.CodeGeneratorRequest.FromString(data))
+    with tempfile.TemporaryDirectory() as tmp:
+        # the plugins must not forward requests to a running daemon
+        env = dict(os.environ, PYTHONPATH=ROOT, **{SOCKET_ENV: os.path.join(tmp, 'no-daemon.sock')})
+        for target in ENTRY_POINTS:
+            responses = set()
+            for mode in MODES:
+                times = []
+                peak_rss = None
+                for _ in range(runs):
+                    if mode == 'in-process':
+                        response, elapsed, rss = run_in_process(data, target)
+                    else:
+                        response, elapsed, rss = run_subprocess(data, target, env)
+                    responses.add(response)
+                    times.append(elapsed)
+                    if rss is not None:
+                        peak_rss = max(rss, peak_rss or 0)
+                error = plugin_pb2.CodeGeneratorResponse.FromString(response).error
+                assert not error, "{} {}: {}".format(name, target, error)
+                best = min(times)
+                yield {
+                    'fixture': name,
+                    'entry_point': target,
+                    'mode': mode,
+                    'request_sha256': hashlib.sha256(data).hexdigest(),
+                    'request_bytes': len(data),
+                    'fields': fields,
+                    'response_bytes': len(response),
+                    'runs': times,
+                    'wall_time': best,
+                    'fields_per_second': fields / best,
+                    'bytes_per_second': len(response) / best,
+                    'peak_rss_kib': peak_rss,
+                }
+            assert len(responses) == 1, "{} {}: responses of runs differ".format(name, target)
+
+
+def environment() -> dict:
+    return {
+        'version': __version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'protobuf': protobuf_version,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def print_result(result: dict):
+    rss = result['peak_rss_kib']
+    print("{:<14} {:<9} {:<11} {:>10.3f} {:>14.0f} {:>12.2f} {:>12}".format(
+        result['fixture'], result['entry_point'], result['mode'], result['wall_time'],
+        result['fields_per_second'], result['bytes_per_second'] / 1024 / 1024,
+        "-" if rss is None else "{:.1f}".format(rss / 1024)))
+
+
+def run(fixtures: List[str], runs: int, out: Optional[str]):
+    print("{:<14} {:<9} {:<11} {:>10} {:>14} {:>12} {:>12}".format(
+        "fixture", "plugin", "mode", "time [s]", "fields/s", "MiB/s", "RSS [MiB]"))
+    results = []
+    for name in fixtures:
+        for result in run_fixture(name, runs):
+            print_result(result)
+            results.append(result)
+    if out:
+        with open(out, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+            f.write("\n")
+
+
+def _key(result: dict):
+    return result['fixture'], result['entry_point'], result['mode']
+
+
+def _ratio(current: Optional[float], baseline: Optional[float]) -> Optional[float]:
+    """Returns ratio of current value to the baseline, None when one of them was not measured"""
+    if current is None or not baseline:
+        return None
+    return current / baseline
+
+
+def _format_ratio(ratio: Optional[float]) -> str:
+    return "-" if ratio is None else "{:.2f}".format(ratio)
+
+
+def compare(baseline_path: str, current_path: str, time_tolerance: float, rss_tolerance: float) -> bool:
+    """Prints ratios of wall times and peak RSS of current results to the baseline, returns whether none of them
+       regressed over the tolerance
+    """
+    with open(baseline_path) as f:
+        baseline = {_key(result): result for result in json.load(f)['results']}
+    with open(current_path) as f:
+        current = {_key(result): result for result in json.load(f)['results']}
+
+    ok = True
+    print("{:<14} {:<9} {:<11} {:>10} {:>10}  {}".format("fixture", "plugin", "mode", "time", "RSS", "status"))
+    for key, base in baseline.items():
+        result = current.get(key)
+        if result is None:
+            print("{:<14} {:<9} {:<11} {:>10} {:>10}  missing".format(*key, "-", "-"))
+            ok = False
+            continue
+        time_ratio = _ratio(result.get('wall_time'), base.get('wall_time'))
+        rss_ratio = _ratio(result.get('peak_rss_kib'), base.get('peak_rss_kib'))
+        problems = []
+        if result.get('request_sha256') != base.get('request_sha256'):
+            problems.append("different request")
+        if time_ratio is not None and time_ratio > 1 + time_tolerance:
+            problems.append("slower")
+        if rss_ratio is not None and rss_ratio > 1 + rss_tolerance:
+            problems.append("more memory")
+        ok = ok and not problems
+        print("{:<14} {:<9} {:<11} {:>10} {:>10}  {}".format(
+            *key, _format_ratio(time_ratio), _format_ratio(rss_ratio), ", ".join(problems) or "ok"))
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    run_parser = commands.add_parser('run', help="run the suite")
+    run_parser.add_argument('--fixture', action='append', choices=FIXTURES,
+                            help="run only this fixture, can be repeated (default: all)")
+    run_parser.add_argument('--runs', type=int, default=3, help="runs of each measurement, the best one is reported")
+    run_parser.add_argument('--out', help="write results into this JSON file")
+
+    compare_parser = commands.add_parser('compare', help="compare results with a baseline")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('results')
+    compare_parser.add_argument('--time-tolerance', type=float, default=0.1,
+                                help="allowed relative increase of wall time (default: 0.1)")
+    compare_parser.add_argument('--rss-tolerance', type=float, default=0.1,
+                                help="allowed relative increase of peak RSS (default: 0.1)")
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args.fixture or FIXTURES, args.runs, args.out)
+    elif not compare(args.baseline, args.results, args.time_tolerance, args.rss_tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+from google.protobuf.compiler import plugin_pb2
+from google.protobuf.descriptor import FieldDescriptor
+from google.protobuf.descriptor_pb2 import FileDescriptorProto
+
+from stubs_generator.base import ConstantPart, NEW_LINE
+from stubs_generator.fields import SimpleType
+from stubs_generator.messages import Constructor, ConstructorParameter, EnumValue, File, Message
+
+
+def make_proto_file(messages: int, fields: int, name: str = "synthetic/bench.proto") -> FileDescriptorProto:
+    """Builds proto file with `messages` messages of `fields` fields each,
+       every message and field has a trailing comment in `source_code_info`
+    """
+    pf = FileDescriptorProto(name=name, package="", syntax="proto3")
+    for m in range(messages):
+        msg = pf.message_type.add(name="Message{}".format(m))
+        location = pf.source_code_info.location.add(path=[4, m])
+        location.trailing_comments = " Message {}\n".format(m)
+        for f in range(fields):
+            msg.field.add(name="field{}".format(f), number=f + 1, type=FieldDescriptor.TYPE_UINT32,
+                          label=FieldDescriptor.LABEL_OPTIONAL)
+            # protoc emits locations for parts of a declaration too, these have no comments
+            pf.source_code_info.location.add(path=[4, m, 2, f, 1])
+            location = pf.source_code_info.location.add(path=[4, m, 2, f])
+            location.trailing_comments = " Field {} of message {}\n".format(f, m)
+    return pf
+
+
+def make_flat_proto_file(messages: int, enums: int, values: int,
+                         name: str = "synthetic/flat.proto") -> FileDescriptorProto:
+    """Builds proto file with `messages` top-level messages of a single field and `enums` top-level enums
+       of `values` values
+    """
+    pf = FileDescriptorProto(name=name, package="synthetic", syntax="proto3")
+    for e in range(enums):
+        enum = pf.enum_type.add(name="Enum{}".format(e))
+        for v in range(values):
+            enum.value.add(name="ENUM{}_VALUE{}".format(e, v), number=v)
+    for m in range(messages):
+        pf.message_type.add(name="Message{}".format(m)).field.add(
+            name="value", number=1, type=FieldDescriptor.TYPE_STRING, label=FieldDescriptor.LABEL_OPTIONAL)
+    return pf
+
+
+def make_nested_proto_file(depth: int, name: str = "synthetic/nested.proto") -> FileDescriptorProto:
+    """Builds proto file with a chain of `depth` nested messages, each one has a commented field
+       of the type of message nested in it
+    """
+    pf = FileDescriptorProto(name=name, package="synthetic", syntax="proto3")
+    msg = pf.message_type.add(name="Level0")
+    path = [4, 0]
+    full_name = ".synthetic.Level0"
+    for level in range(1, depth + 1):
+        nested = msg.nested_type.add(name="Level{}".format(level))
+        full_name += "." + nested.name
+        msg.field.add(name="child", number=1, type=FieldDescriptor.TYPE_MESSAGE, type_name=full_name,
+                      label=FieldDescriptor.LABEL_OPTIONAL)
+        location = pf.source_code_info.location.add(path=path + [2, 0])
+        location.trailing_comments = " Child of level {}\n".format(level - 1)
+        msg = nested
+        path += [3, 0]
+    return pf
+
+
+def make_service_proto_file(methods: int, types: int, name: str = "synthetic/service.proto") -> FileDescriptorProto:
+    """Builds proto file with a service of `methods` methods, which use `types` messages imported from other file"""
+    pf = FileDescriptorProto(name=name, package="synthetic.service", syntax="proto3",
+                             dependency=["synthetic/file0.proto"])
+    service = pf.service.add(name="Service")
+    for m in range(methods):
+        service.method.add(name="Method{}".format(m),
+                           input_type=".synthetic.file0.Message{}".format(m % types),
+                           output_type=".synthetic.file0.Message{}".format((m + 1) % types))
+    return pf
+
+
+def make_stub_tree(messages: int, fields: int) -> File:
+    """Builds stub tree of `messages` messages with `fields` commented fields each"""
+    return File([
+        ConstantPart("# synthetic\n"),
+        NEW_LINE,
+        *[Message(
+            "Message{}".format(m),
+            [],
+            [
+                EnumValue("A", 0),
+                NEW_LINE,
+                Constructor([ConstructorParameter(SimpleType("int", repeated=bool(f % 2)),
+                                                  "field{}".format(f),
+                                                  [" Field {} of message {}".format(f, m)])
+                             for f in range(fields)]),
+            ],
+        ) for m in range(messages)]
+    ])
+
+
+def make_request(files: int, messages: int, fields: int, parameter: str = "") -> plugin_pb2.CodeGeneratorRequest:
+    """Builds request for generation of `files` proto files, each one with a service and `messages` messages
+       of `fields` fields, every second field references a message from previous file
+    """
+    request = plugin_pb2.CodeGeneratorRequest(parameter=parameter)
+    for i in range(files):
+        pf = make_proto_file(messages, fields, name="synthetic/file{}.proto".format(i))
+        pf.package = "synthetic.file{}".format(i)
+        if i:
+            pf.dependency.append("synthetic/file{}.proto".format(i - 1))
+            for msg in pf.message_type:
+                for field in msg.field[::2]:
+                    field.type = FieldDescriptor.TYPE_MESSAGE
+                    field.type_name = ".synthetic.file{}.Message0".format(i - 1)
+        service = pf.service.add(name="Service{}".format(i))
+        for m, msg in enumerate(pf.message_type):
+            service.method.add(name="Method{}".format(m),
+                               input_type=".{}.{}".format(pf.package, msg.name),
+                               output_type=".{}.{}".format(pf.package, msg.name))
+        request.proto_file.append(pf)
+        request.file_to_generate.append(pf.name)
+    return request
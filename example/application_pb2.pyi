@@ -3,12 +3,9 @@
 #   by protoc-gen-python_typings plugin for protoc                              #
 # ############################################################################# #
 
-from google.api.annotations_pb2 import *
-from google.protobuf import *
 from google.protobuf.descriptor import FieldDescriptor
-from google.protobuf.empty_pb2 import *
-from google.protobuf.internal.well_known_types import Timestamp
 from google.protobuf.message import Message
+from google.protobuf.timestamp_pb2 import Timestamp
 from typing import List
 
 A: int = 0
@@ -4,7 +4,7 @@
 # ############################################################################# #
 
 from abc import ABC, abstractmethod
-from example.application_pb2 import *
+from example.application_pb2 import SimpleMessage
 from grpc import ServicerContext, Channel, Server, CallCredentials
 from typing import Any
 
@@ -13,20 +13,36 @@ class UserMortgageServiceStub(object):
     def __init__(self, channel: Channel):
         pass
 
-    def Check(self, request: SimpleMessage, timeout: int = None, metadata: Any = None, credentials: CallCredentials = None) -> SimpleMessage:
+    def Check(self,
+              request: SimpleMessage,
+              timeout: int = None,
+              metadata: Any = None,
+              credentials: CallCredentials = None
+              ) -> SimpleMessage:
         pass
 
-    def Check2(self, request: SimpleMessage, timeout: int = None, metadata: Any = None, credentials: CallCredentials = None) -> SimpleMessage:
+    def Check2(self,
+               request: SimpleMessage,
+               timeout: int = None,
+               metadata: Any = None,
+               credentials: CallCredentials = None
+               ) -> SimpleMessage:
         pass
 
 
 class UserMortgageServiceServicer(ABC):
     @abstractmethod    
-    def Check(self, request: SimpleMessage, context: ServicerContext) -> SimpleMessage:
+    def Check(self,
+              request: SimpleMessage,
+              context: ServicerContext
+              ) -> SimpleMessage:
         pass
 
     @abstractmethod    
-    def Check2(self, request: SimpleMessage, context: ServicerContext) -> SimpleMessage:
+    def Check2(self,
+               request: SimpleMessage,
+               context: ServicerContext
+               ) -> SimpleMessage:
         pass
 
 
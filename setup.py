@@ -2,11 +2,12 @@ from setuptools import setup
 
 setup(
     name="ProtoC Python Typing generator plugin",
-    version="0.2",
+    version="0.3",
 
     install_requires=['protobuf'],
 
-    scripts=['protoc-gen-python_grpc_typings', 'protoc-gen-python_typings'],
+    scripts=['protoc-gen-python_grpc_typings', 'protoc-gen-python_typings', 'protoc-gen-python_all_typings',
+             'python-typings-batch'],
     packages=['stubs_generator'],
 
     # metadata for upload to PyPI
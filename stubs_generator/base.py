@@ -1,10 +1,66 @@
 from abc import ABC, abstractmethod
-from typing import Type, cast
+from functools import lru_cache
+from io import StringIO
+from string import Formatter
+from typing import Callable, Dict, TextIO, Tuple, Type, cast
+
+
+def compile_template(template: str) -> Callable[..., str]:
+    """Compiles `str.format` template with named fields into a function that renders it
+       from keyword arguments with the same output, but without parsing the template on every call;
+       all fields of the template must be given
+    """
+    names = []
+    parts = []
+    for literal, field, spec, conversion in Formatter().parse(template):
+        if literal:
+            parts.append(repr(literal))
+        if field is not None:
+            assert field.isidentifier() and not spec and not conversion, template
+            if field not in names:
+                names.append(field)
+            parts.append("f'{{{}}}'".format(field))
+    # fields are required keyword arguments, so a missing one fails like in `str.format` (with `TypeError`
+    # instead of `KeyError`), unused arguments are ignored the same way as by `str.format`
+    source = "def render({}**_):\n    return {}\n".format(
+        "*, {}, ".format(", ".join(names)) if names else "",
+        " ".join(parts) or "''"
+    )
+    namespace = {}
+    exec(source, namespace)
+    return namespace['render']
+
+
+class Template(str):
+    """Template string with `format` method replaced by its compiled version"""
+
+    def __new__(cls, template: str):
+        self = super().__new__(cls, template)
+        self.format = compile_template(template)
+        return self
+
+
+def _compile_templates(cls: type):
+    """Compiles all templates (class attributes with name ending by `TEMPLATE`) of the class"""
+    for name, value in list(vars(cls).items()):
+        if name.endswith('TEMPLATE') and isinstance(value, str) and not isinstance(value, Template):
+            setattr(cls, name, Template(value))
+
+
+@lru_cache(maxsize=None)
+def indent(indentation_str: str, indentation: int) -> str:
+    """Indentation string for given depth, it is computed only once per depth"""
+    return indentation_str * indentation
 
 
 class FieldType(ABC):
     """Base class for all field type representations in proto file
        with `generate` method that returns its representation in python"""
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _compile_templates(cls)
 
     @abstractmethod
     def generate(self) -> str:
@@ -14,21 +70,53 @@ class FieldType(ABC):
 class CodePart(ABC):
     """Base class for all construction (message, enum, field, ...) representations in proto file
        with `generate` method that returns its representation in python"""
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _compile_templates(cls)
 
     @abstractmethod
     def generate(self, indentation: int, indentation_str: str) -> str:
         pass
 
+    def write(self, out: TextIO, indentation: int, indentation_str: str):
+        """Writes representation in python into `out`"""
+        out.write(self.generate(indentation, indentation_str))
+
+
+class CompositePart(CodePart):
+    """Base class for constructions holding other parts, which are written one by one into shared output
+       in a single pass, so no string is built for the whole subtree. `generate` only collects the output."""
+    __slots__ = ()
+
+    def generate(self, indentation: int, indentation_str: str) -> str:
+        out = StringIO()
+        self.write(out, indentation, indentation_str)
+        return out.getvalue()
+
+    @abstractmethod
+    def write(self, out: TextIO, indentation: int, indentation_str: str):
+        pass
+
 
 class ConstantPart(CodePart):
+    __slots__ = ('_data', '_rendered')
+
     def __init__(self, const_data: str):
-        self._data = const_data
+        self._data = Template(const_data)
+        # output depends only on indentation, so it is rendered once per indentation level
+        self._rendered: Dict[Tuple[int, str], str] = {}
 
     def generate(self, indentation: int, indentation_str: str):
-        return self._data.format(
-            indent=indentation_str * indentation,
-            indent_inner=indentation_str * (indentation + 1)
-        )
+        try:
+            return self._rendered[indentation, indentation_str]
+        except KeyError:
+            rendered = self._rendered[indentation, indentation_str] = self._data.format(
+                indent=indent(indentation_str, indentation),
+                indent_inner=indent(indentation_str, indentation + 1)
+            )
+            return rendered
 
 
 ConstantPart = cast(Type[CodePart], ConstantPart)
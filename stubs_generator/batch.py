@@ -0,0 +1,110 @@
+import argparse
+import mmap
+import os
+import sys
+import time
+from typing import List
+
+from google.protobuf.descriptor_pb2 import FileDescriptorSet
+
+from stubs_generator.modules import import_package, resolve_dependencies, scan_sources
+from stubs_generator.output import write_manifest, write_stub
+from stubs_generator.plugin import TARGET_CHOICES, compact_targets, generate_file_lists
+from stubs_generator.symbols import SymbolTable
+
+
+def read_descriptor_set(path: str) -> FileDescriptorSet:
+    """Parses descriptor set straight from memory mapped file"""
+    descriptor_set = FileDescriptorSet()
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return descriptor_set
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as data:
+            descriptor_set.ParseFromString(data)
+    return descriptor_set
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m stubs_generator.batch",
+        description="Generates stubs for all files of descriptor sets created by "
+                    "`protoc --descriptor_set_out --include_imports --include_source_info` "
+                    "or of generated `_pb2` modules")
+    parser.add_argument('descriptor_sets', nargs='*', metavar='DESCRIPTOR_SET')
+    parser.add_argument('--scan', action='append', default=[], metavar='DIR',
+                        help="generate stubs for `_pb2.py` modules in the directory tree, "
+                             "descriptors are read from their source without importing them")
+    parser.add_argument('--import-package', action='append', default=[], metavar='PACKAGE',
+                        help="generate stubs for `_pb2` modules of the imported package")
+    parser.add_argument('-o', '--out', required=True, help="output directory")
+    parser.add_argument('-f', '--file', action='append', dest='files',
+                        help="generate only this proto file, can be repeated")
+    parser.add_argument('--all', action='store_true',
+                        help="generate all files of descriptor sets, including imported files like well-known "
+                             "types, whose stubs shadow the installed packages")
+    parser.add_argument('-t', '--target', choices=TARGET_CHOICES, default='both', help="generated stub files")
+    parser.add_argument('--compact', action='store_true',
+                        help="messages share a base class instead of repeating the implementation block")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help="count of worker processes")
+    parser.add_argument('--timings', action='store_true', help="report time of generation of every file")
+    parser.add_argument('--manifest', help="write JSON list of changed stub files into this file")
+    args = parser.parse_args(argv)
+    if not (args.descriptor_sets or args.scan or args.import_package):
+        parser.error("a descriptor set, --scan or --import-package is required")
+    if args.descriptor_sets and not (args.files or args.all):
+        # sets made with --include_imports contain every imported file, protoc does not mark those to generate
+        parser.error("select proto files of descriptor sets with -f or generate all of them with --all")
+
+    start = time.perf_counter()
+    proto_files = {}
+    for path in args.descriptor_sets:
+        for proto_file in read_descriptor_set(path).file:
+            proto_files.setdefault(proto_file.name, proto_file)
+    # files of descriptor sets are generated only with --all, modules are always generated
+    modules = {}
+    for root in args.scan:
+        for proto_file in scan_sources(root):
+            modules.setdefault(proto_file.name, proto_file)
+    for package in args.import_package:
+        for proto_file in import_package(package):
+            modules.setdefault(proto_file.name, proto_file)
+    for name, proto_file in modules.items():
+        proto_files.setdefault(name, proto_file)
+    symbols = SymbolTable(proto_files.values())
+    # modules contain only their own descriptor, imported files are looked up in the default descriptor pool
+    for proto_file in resolve_dependencies(proto_files.values()):
+        symbols.add_file(proto_file)
+
+    if args.files:
+        missing = [name for name in args.files if name not in proto_files]
+        if missing:
+            parser.error("not in descriptor sets: {}".format(", ".join(missing)))
+        selected = [proto_files[name] for name in args.files]
+    elif args.all:
+        selected = list(proto_files.values())
+    else:
+        selected = [proto_files[name] for name in modules]
+    loaded = time.perf_counter()
+
+    targets = TARGET_CHOICES[args.target]
+    if args.compact:
+        targets = compact_targets(targets)
+    changed, unchanged = [], []
+    for proto_file, (files, elapsed) in zip(selected, generate_file_lists(selected, symbols, targets, args.jobs)):
+        for name, content in files:
+            (changed if write_stub(args.out, name, content) else unchanged).append(name)
+        if args.timings:
+            print("{:10.1f} ms  {}".format(elapsed * 1000, proto_file.name), file=sys.stderr)
+
+    if args.manifest:
+        write_manifest(args.manifest, changed, unchanged)
+
+    if args.timings:
+        print("{:10.1f} ms  loading of descriptor sets".format((loaded - start) * 1000), file=sys.stderr)
+        print("{:10.1f} ms  total for {} files".format((time.perf_counter() - start) * 1000, len(selected)),
+              file=sys.stderr)
+        print("written {} of {} stub files".format(len(changed), len(changed) + len(unchanged)), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
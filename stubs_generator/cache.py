@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from google.protobuf.descriptor_pb2 import FileDescriptorProto
+
+from stubs_generator import __version__
+from stubs_generator.symbols import SymbolTable
+
+# Default limit of the cache directory size in MiB
+DEFAULT_MAX_SIZE = 256
+
+_ENTRY_SUFFIX = '.json'
+_TEMP_PREFIX = '.tmp-'
+# Temporary files older than this (in seconds) were left by killed runs, entries are written much faster
+_TEMP_MAX_AGE = 10 * 60
+
+
+def cache_key(proto_file: FileDescriptorProto, symbols: SymbolTable, options: Iterable[str]) -> str:
+    """Computes hash of everything what affects stubs generated for the proto file: generator version,
+       generation options, the file itself with its source info and symbols of all files it imports
+    """
+    digest = hashlib.sha256()
+
+    def update(*parts: str):
+        for part in parts:
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+
+    update(__version__, *options)
+    digest.update(proto_file.SerializeToString(deterministic=True))
+    for dependency in symbols.dependency_closure(proto_file.name):
+        update(dependency)
+        for full_name, symbol in symbols.file_symbols(dependency):
+            update(full_name, *map(str, symbol))
+    return digest.hexdigest()
+
+
+class StubCache:
+    """Stubs rendered for a proto file stored in a directory under the hash of inputs of the generation
+
+       Entries are written atomically (into a temporary file which replaces the entry), so concurrent runs
+       never see a partial entry. When the directory grows over `max_size` MiB, least recently used
+       entries are evicted.
+    """
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_MAX_SIZE):
+        self._directory = directory
+        self._max_size = max_size * 1024 * 1024
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, key[:2], key + _ENTRY_SUFFIX)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def get(self, key: str) -> Optional[List[Tuple[str, str]]]:
+        """Returns cached stub files (name, content) or None when there is no such entry"""
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                files = json.load(f)
+            # modification time is the time of last use for eviction
+            os.utime(path)
+        except (OSError, ValueError):
+            # evicted by other run in the meantime or unreadable, it will be generated again
+            return None
+        return [(name, content) for name, content in files]
+
+    def put(self, key: str, files: List[Tuple[str, str]]):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=_TEMP_PREFIX, dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(files, f)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits into its maximal size
+           and temporary files left by runs killed while writing an entry
+        """
+        entries = []
+        total = 0
+        temp_deadline = time.time() - _TEMP_MAX_AGE
+        for bucket in os.scandir(self._directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.name.startswith(_TEMP_PREFIX):
+                    _remove_stale_temp(entry, temp_deadline)
+                    continue
+                if not entry.name.endswith(_ENTRY_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self._max_size:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total -= size
+
+
+def _remove_stale_temp(entry: os.DirEntry, deadline: float):
+    try:
+        if entry.stat().st_mtime < deadline:
+            os.unlink(entry.path)
+    except OSError:
+        # removed by other run or still written
+        pass
+
+
+class MemoryStubCache:
+    """Rendered stubs kept in memory of a long running process, with the same interface as `StubCache`"""
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        self._max_size = max_size * 1024 * 1024
+        self._size = 0
+        self._entries: 'OrderedDict[str, List[Tuple[str, str]]]' = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[List[Tuple[str, str]]]:
+        files = self._entries.get(key)
+        if files is not None:
+            self._entries.move_to_end(key)
+        return files
+
+    def put(self, key: str, files: List[Tuple[str, str]]):
+        if key in self._entries:
+            self._size -= _files_size(self._entries.pop(key))
+        self._entries[key] = files
+        self._size += _files_size(files)
+
+    def evict(self):
+        while self._size > self._max_size and self._entries:
+            _, files = self._entries.popitem(last=False)
+            self._size -= _files_size(files)
+
+
+def _files_size(files: List[Tuple[str, str]]) -> int:
+    return sum(len(content) for _, content in files)
@@ -0,0 +1,111 @@
+# Thin client of the generator daemon used by plugin scripts. It is imported before anything else,
+# so it must not import `google.protobuf` or the generator, these are loaded only when there is no daemon
+# to forward the request to.
+#
+# The daemon is used only when its socket is given by `PROTOC_GEN_PYTHON_TYPINGS_SOCKET`. Its response is written
+# by protoc as it is, so the socket must be private to the user running the plugin: the socket and its directory
+# have to belong to the user and be inaccessible to others, and the daemon on the other end has to run as the user.
+import os
+import socket
+import stat
+import struct
+import sys
+from typing import Optional
+
+from stubs_generator.profiling import profiling_requested
+from stubs_generator.tracing import read_request, tracing_requested
+
+# Environment variable with path to the unix socket of the daemon
+SOCKET_ENV = 'PROTOC_GEN_PYTHON_TYPINGS_SOCKET'
+
+# Messages are sent as frames prefixed by their length
+FRAME_HEADER = struct.Struct('>I')
+
+CONNECT_TIMEOUT = 1.0
+
+
+def default_socket_path() -> str:
+    """Path where the daemon listens when no socket is given, its directory is private to the user"""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, 'protoc-gen-python-typings.sock')
+    return os.path.join('/tmp', 'protoc-gen-python-typings-{}'.format(os.getuid()), 'daemon.sock')
+
+
+def socket_path() -> Optional[str]:
+    """Returns path of the daemon socket, or None when the daemon should not be used"""
+    return os.environ.get(SOCKET_ENV) or None
+
+
+def _is_private(st: os.stat_result) -> bool:
+    return st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+
+def is_private_socket(path: str) -> bool:
+    """Checks that the socket and its directory belong to this user and nobody else can access them"""
+    try:
+        socket_stat = os.lstat(path)
+        directory_stat = os.stat(os.path.dirname(os.path.abspath(path)))
+    except OSError:
+        return False
+    return stat.S_ISSOCK(socket_stat.st_mode) and _is_private(socket_stat) and _is_private(directory_stat)
+
+
+def _peer_uid(sock: socket.socket) -> Optional[int]:
+    """Returns user id of the process on the other end of a connected unix socket, None when it is not known"""
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    credentials = struct.Struct('3i')
+    _, uid, _ = credentials.unpack(sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, credentials.size))
+    return uid
+
+
+def frame(payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("daemon closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def request_daemon(default_target: str, data: bytes, path: str = None) -> Optional[bytes]:
+    """Sends serialized request to the daemon and returns serialized response, or None when the daemon is not
+       running, its socket is not private to this user or it does not run as this user, or the request failed
+    """
+    path = path or socket_path()
+    if path is None or not is_private_socket(path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(path)
+            if _peer_uid(sock) != os.getuid():
+                return None
+            sock.settimeout(None)
+            # relative paths in parameters are resolved by the daemon against working directory of protoc
+            sock.sendall(frame(default_target.encode('utf-8')) + frame(os.getcwd().encode('utf-8')) + frame(data))
+            size, = FRAME_HEADER.unpack(_recv_exactly(sock, FRAME_HEADER.size))
+            return _recv_exactly(sock, size)
+    except OSError:
+        return None
+
+
+def run(default_target: str):
+    """Runs the plugin in the daemon when it is available and in this process otherwise,
+       profiled and traced runs are always run in this process
+    """
+    data = read_request()
+    in_process = profiling_requested(data) or tracing_requested(data)
+    output = None if in_process else request_daemon(default_target, data)
+    if output is None:
+        from stubs_generator.plugin import main
+        main(default_target, data)
+    else:
+        sys.stdout.buffer.write(output)
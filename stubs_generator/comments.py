@@ -0,0 +1,69 @@
+from typing import Dict, Iterator, List, Tuple
+
+from google.protobuf.descriptor_pb2 import FileDescriptorProto
+
+# Repeated descriptor fields (by field number in `descriptor.proto`) which hold named symbols,
+# together with the kind of the symbol stored in them
+_CHILDREN = {
+    'file': ((4, 'message_type', 'message'),
+             (5, 'enum_type', 'enum'),
+             (6, 'service', 'service'),
+             (7, 'extension', 'field')),
+    'message': ((2, 'field', 'field'),
+                (3, 'nested_type', 'message'),
+                (4, 'enum_type', 'enum'),
+                (6, 'extension', 'field'),
+                (8, 'oneof_decl', 'oneof')),
+    'enum': ((2, 'value', 'value'),),
+    'service': ((2, 'method', 'method'),),
+}
+
+# Kinds of symbols whose name is a part of the name of their children
+_SCOPES = frozenset(('message', 'service'))
+
+Path = Tuple[int, ...]
+
+
+def iter_symbol_paths(pf: FileDescriptorProto) -> Iterator[Tuple[Path, str]]:
+    """Yields location path of every named symbol in proto file together with its name,
+       which is the symbol name prefixed by names of the messages and services it is nested in
+    """
+    stack = [((), (), pf, 'file')]
+    while stack:
+        path, scope, descriptor, kind = stack.pop()
+        if kind in _SCOPES:
+            scope = scope + (descriptor.name,)
+        for number, attr, child_kind in _CHILDREN.get(kind, ()):
+            for index, child in enumerate(getattr(descriptor, attr)):
+                child_path = path + (number, index)
+                yield child_path, ".".join(scope + (child.name,))
+                if child_kind in _CHILDREN:
+                    stack.append((child_path, scope, child, child_kind))
+
+
+class CommentIndex:
+    """Comments of a proto file indexed by the name of symbol they are aimed at
+
+       Index is built in one pass over the descriptor and one pass over `source_code_info`,
+       names of symbols are looked up by location path in precomputed dictionary.
+    """
+
+    def __init__(self, pf: FileDescriptorProto):
+        self.leading: Dict[str, List[str]] = {}
+        self.trailing: Dict[str, List[str]] = {}
+        self.detached: Dict[str, List[List[str]]] = {}
+
+        if not pf.source_code_info.location:
+            return
+        names = dict(iter_symbol_paths(pf))
+        for location in pf.source_code_info.location:
+            name = names.get(tuple(location.path))
+            if name is None:
+                # location of something without a name (syntax, options, type of field, ...)
+                continue
+            if location.leading_comments:
+                self.leading[name] = location.leading_comments.splitlines()
+            if location.trailing_comments:
+                self.trailing[name] = location.trailing_comments.splitlines()
+            if location.leading_detached_comments:
+                self.detached[name] = [comment.splitlines() for comment in location.leading_detached_comments]
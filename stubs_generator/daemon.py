@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from stubs_generator.client import FRAME_HEADER, SOCKET_ENV, default_socket_path, frame, socket_path
+from stubs_generator.plugin import generate_serialized
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    size, = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    return await reader.readexactly(size)
+
+
+def _prepare_directory(path: str):
+    """Creates directory of the socket private to the user, clients refuse sockets in directories of others"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    st = os.stat(directory)
+    if st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise SystemExit("directory of the socket {} must belong to the user and have mode 0700".format(directory))
+
+
+def _remove_stale_socket(path: str):
+    """Removes socket left by a daemon which is not running anymore"""
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+            return
+    raise SystemExit("daemon is already running on {}".format(path))
+
+
+class Daemon:
+    """Serves requests of plugin clients (see `stubs_generator.client`) on a unix socket
+
+       Each connection carries one request, which is generated in a pool of worker processes. The workers
+       keep the generator imported and its caches warm between requests and generate requests of concurrent
+       clients in parallel, without sharing any state between them. Relative paths in parameters of a request
+       are resolved against working directory of its client, which is sent before the request.
+    """
+
+    def __init__(self, path: str, workers: int = None):
+        self._path = path
+        self._workers = workers or os.cpu_count()
+        self._executor = ProcessPoolExecutor(self._workers)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            default_target = (await _read_frame(reader)).decode('utf-8')
+            cwd = (await _read_frame(reader)).decode('utf-8')
+            data = await _read_frame(reader)
+            output = await asyncio.get_running_loop().run_in_executor(
+                self._executor, generate_serialized, data, default_target, cwd)
+            writer.write(frame(output))
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            # client went away, there is nobody to answer
+            pass
+        except Exception:
+            # connection is closed without response, so the client generates the request itself and reports the error
+            traceback.print_exc()
+        finally:
+            writer.close()
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        # import the generator in all workers before the first request comes
+        await asyncio.gather(*[loop.run_in_executor(self._executor, generate_serialized, b"", 'both')
+                               for _ in range(self._workers)])
+
+        _prepare_directory(self._path)
+        _remove_stale_socket(self._path)
+        # socket is created without access of others, it is not reachable by them even before `chmod`
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._handle, path=self._path)
+        finally:
+            os.umask(umask)
+        os.chmod(self._path, 0o600)
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            os.unlink(self._path)
+            self._executor.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generator daemon serving protoc-gen-python_*typings plugins")
+    parser.add_argument('--socket', default=socket_path() or default_socket_path(),
+                        help="path of the unix socket (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="count of worker processes (default: %(default)s)")
+    args = parser.parse_args(argv)
+    print("serving on {}, plugins use it with {}={}".format(args.socket, SOCKET_ENV, args.socket), file=sys.stderr)
+    asyncio.run(Daemon(args.socket, args.workers).serve())
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,8 @@ from stubs_generator.base import FieldType
 
 
 class SimpleType(FieldType):
+    __slots__ = ('_value_type',)
+
     def __init__(self, value_type: str, repeated: bool):
         self._value_type = value_type
         if repeated:
@@ -12,6 +14,8 @@ class SimpleType(FieldType):
 
 
 class MessageType(FieldType):
+    __slots__ = ('_value_type',)
+
     def __init__(self, reference: str, repeated: bool):
         self._value_type = reference
         if repeated:
@@ -22,6 +26,8 @@ class MessageType(FieldType):
 
 
 class OneOfGroupType(FieldType):
+    __slots__ = ('_value_type',)
+
     def __init__(self, *fields: FieldType):
         self._value_type = "Union[{}]".format(", ".join(f.generate() for f in fields))
 
@@ -0,0 +1,212 @@
+from itertools import chain
+from typing import Dict, List
+
+from google.protobuf.descriptor import FieldDescriptor
+from google.protobuf.descriptor_pb2 import FileDescriptorProto
+
+from stubs_generator.base import ConstantPart, NEW_LINE
+from stubs_generator.messages import (CompactMessageBase, Constructor, ConstructorParameter, EnumValue, File, Import,
+                                     Message)
+from stubs_generator.servicers import AbstractMethod, AddToServerMethod, Servicer, Stub, StubMethod
+from stubs_generator.symbols import SymbolTable, proto_module
+from stubs_generator.tracing import span
+from stubs_generator.utils import (ImportPool, TypeDecoder, after_every, before_every, before_if_not_empty,
+                                   get_comments)
+
+DEFAULT_TAB_STR = '    '
+
+
+def _message_stub(types, comments, msg, path, nested, compact) -> Message:
+    """Generates the message of already generated nested messages, `path` are names of its parents and its own"""
+    # qualified name of the message prefixes names of its fields in comments and of its nested messages
+    scope = ".".join(path) + "."
+    return Message(
+        msg.name,
+        path[:-1],
+        chain(
+            # Message enumerator values
+            after_every(
+                [NEW_LINE],
+                (EnumValue(value.name, value.number)
+                 for enum in msg.enum_type
+                 for value in enum.value)
+            ),
+            # Nested messages
+            before_if_not_empty(
+                [],
+                after_every(
+                    [NEW_LINE],
+                    nested
+                ),
+                _else=[NEW_LINE]
+            ),
+            [Constructor(
+                ConstructorParameter(
+                    types.decode(field.type, field.type_name, field.label == FieldDescriptor.LABEL_REPEATED, scope),
+                    field.name,
+                    comments.get(scope + field.name, [])
+                ) for field in msg.field
+            )],
+        ),
+        compact=compact,
+    )
+
+
+def generate_message_stub(symbols, module, import_pool, comments, msg, parents=None, compact=False,
+                          types=None) -> Message:
+    """Generates the message with all nested messages, the tree is traversed iteratively,
+       so deeply nested messages do not hit the recursion limit. Messages of the same stub should share
+       its `types` decoder.
+    """
+    if types is None:
+        types = TypeDecoder(symbols, module, import_pool)
+    # names of the message being visited and its parents, shared by all messages of the tree
+    path = list(parents or [])
+    # every message is visited twice, on the first visit its nested messages are scheduled
+    # and on the second one it is generated of them
+    stack = [(msg, False)]
+    # generated messages waiting for their parent
+    generated: List[Message] = []
+    while stack:
+        msg, visited = stack.pop()
+        if not visited:
+            path.append(msg.name)
+            stack.append((msg, True))
+            stack.extend((nested_msg, False) for nested_msg in reversed(msg.nested_type))
+            continue
+        count = len(msg.nested_type)
+        nested = generated[len(generated) - count:]
+        del generated[len(generated) - count:]
+        generated.append(_message_stub(types, comments, msg, path, nested, compact))
+        path.pop()
+    return generated[0]
+
+
+def generate_pb2_stub_file(proto_descriptor: FileDescriptorProto, symbols: SymbolTable,
+                           comments: Dict[str, List[str]] = None, compact: bool = False) -> File:
+    """Generates tree of typing stub file for messages, messages of `compact` stub share a base class
+       instead of repeating the implementation block. The whole tree is built here, nodes consume iterables
+       of their parts, so types are resolved and imports added before it is rendered
+    """
+    if comments is None:
+        comments = get_comments(proto_descriptor)
+    with span('import pool'):
+        import_pool = ImportPool()
+        import_pool.add(Import("typing", ["List"]))
+        import_pool.add(Import("google.protobuf.message", ["Message"]))
+        if compact:
+            import_pool.add(Import("typing", ["TypeVar"]))
+            import_pool.reserve([CompactMessageBase.NAME, CompactMessageBase.TYPE_VAR])
+        else:
+            import_pool.add(Import("google.protobuf.descriptor", ["FieldDescriptor"]))
+        import_pool.reserve(msg.name for msg in proto_descriptor.message_type)
+        import_pool.reserve(value.name for enum in proto_descriptor.enum_type for value in enum.value)
+    module = proto_module(proto_descriptor.name)
+    types = TypeDecoder(symbols, module, import_pool)
+
+    return File(chain(
+        [
+            # Header for a file
+            ConstantPart("""\
+# ############################################################################# #
+#  Automatically generated protobuf stub files for python                       #
+#   by protoc-gen-python_typings plugin for protoc                              #
+# ############################################################################# #
+
+"""),
+            import_pool,
+            # Typing imports
+            NEW_LINE,
+        ],
+        # Global enumerator values
+        after_every(
+            [NEW_LINE],
+            (EnumValue(value.name, value.number)
+             for msg in proto_descriptor.enum_type
+             for value in msg.value)
+        ),
+        # Messages
+        before_if_not_empty(
+            [NEW_LINE, NEW_LINE, CompactMessageBase(), NEW_LINE, NEW_LINE] if compact else [NEW_LINE, NEW_LINE],
+            after_every(
+                [NEW_LINE, NEW_LINE],
+                (generate_message_stub(symbols, module, import_pool, comments, msg, compact=compact, types=types)
+                 for msg in proto_descriptor.message_type)
+            )
+        ),
+    ))
+
+
+def generate_pb2_stub_file_content(proto_descriptor: FileDescriptorProto, symbols: SymbolTable,
+                                   comments: Dict[str, List[str]] = None, compact: bool = False) -> str:
+    """Generates typing stub file for messages, building of its tree and rendering of the text are traced apart"""
+    with span('message tree'):
+        stub = generate_pb2_stub_file(proto_descriptor, symbols, comments, compact)
+    with span('render'):
+        return stub.generate(0, DEFAULT_TAB_STR)
+
+
+def generate_pb2_grpc_stub_file(proto_descriptor: FileDescriptorProto, symbols: SymbolTable,
+                                comments: Dict[str, List[str]] = None) -> File:
+    """Generates tree of typing stub file for servicers, the whole tree is built here like the tree of messages"""
+    if comments is None:
+        comments = get_comments(proto_descriptor)
+    module = proto_module(proto_descriptor.name) + '_grpc'
+    with span('import pool'):
+        import_pool = ImportPool()
+        import_pool.add(Import('grpc', ['ServicerContext', 'Channel', 'Server', 'CallCredentials']))
+        import_pool.add(Import('abc', ['ABC', 'abstractmethod']))
+        import_pool.add(Import('typing', ['Any']))
+        import_pool.reserve(name.format(s.name) for s in proto_descriptor.service
+                            for name in ('{}Stub', '{}Servicer', 'add_{}Servicer_to_server'))
+    # the same types are used by methods of both stub and servicer
+    types = TypeDecoder(symbols, module, import_pool)
+    return File(chain(
+        [
+            # Header for a file
+            ConstantPart("""\
+# ############################################################################# #
+#  Automatically generated protobuf stub files for python                       #
+#   by protoc-gen-python_grpc_typings plugin for protoc                         #
+# ############################################################################# #
+
+"""),
+            import_pool,
+        ],
+        before_every(
+            [NEW_LINE, NEW_LINE],
+            chain(
+                # Stub servicer
+                (Stub(
+                    s.name,
+                    (StubMethod(meth.name,
+                                types.decode(name=meth.input_type),
+                                types.decode(name=meth.output_type),
+                                comments.get("{}.{}".format(s.name, meth.name), []))
+                     for meth in s.method),
+                    comments=comments.get(s.name, []),
+                ) for s in proto_descriptor.service),
+                # Abstract servicer
+                (Servicer(
+                    s.name,
+                    (AbstractMethod(meth.name,
+                                    types.decode(name=meth.input_type),
+                                    types.decode(name=meth.output_type),
+                                    comments.get("{}.{}".format(s.name, meth.name), []))
+                     for meth in s.method),
+                    comments=comments.get(s.name, []),
+                ) for s in proto_descriptor.service),
+                (AddToServerMethod(s.name)
+                 for s in proto_descriptor.service)
+            )
+        )
+    ))
+
+
+def generate_pb2_grpc_stub_file_content(proto_descriptor: FileDescriptorProto, symbols: SymbolTable,
+                                        comments: Dict[str, List[str]] = None) -> str:
+    """Generates typing stub file for servicers, building of its tree and rendering of the text are traced apart"""
+    with span('service tree'):
+        stub = generate_pb2_grpc_stub_file(proto_descriptor, symbols, comments)
+    with span('render'):
+        return stub.generate(0, DEFAULT_TAB_STR)
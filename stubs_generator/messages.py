@@ -1,9 +1,11 @@
-from typing import List, Optional, Union
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, TextIO
 
-from .base import CodePart, FieldType, NEW_LINE, NO_OP
+from .base import CodePart, CompositePart, FieldType, NEW_LINE, NO_OP, Template, indent
 
 
 class EnumValue(CodePart):
+    __slots__ = ('_name', '_value')
     TEMPLATE = """{indent}{name}: int = {value}"""
 
     def __init__(self, name: str, value: int):
@@ -14,11 +16,12 @@ class EnumValue(CodePart):
         return self.TEMPLATE.format(
             name=self._name,
             value=self._value,
-            indent=indentation_str * indentation
+            indent=indent(indentation_str, indentation)
         )
 
 
 class Field(CodePart):
+    __slots__ = ('_type', '_name', '_value')
     TEMPLATE = """{indent}{name}{type} = {value}"""
 
     def __init__(self, value_type: Optional[FieldType], name: str, value: str = "..."):
@@ -31,36 +34,44 @@ class Field(CodePart):
             name=self._name,
             value=self._value,
             type=": {}".format(self._type.generate()) if self._type else "",
-            indent=indentation_str * indentation
+            indent=indent(indentation_str, indentation)
         )
 
 
 class FieldComment(CodePart):
-    TEMPLATE = """{indent}:param {name}:{comment}{multiline_comment}"""
+    __slots__ = ('_name', '_comment')
+    TEMPLATE = """{indent}:param {name}:{comment}"""
+    # following lines of the comment are aligned with its first line
+    LINE_TEMPLATE = """
+{indent}       {name_padding}  {comment}"""
 
     def __init__(self, name: str, comment: List[str]):
         self._name = name
         self._comment = comment
-        self._multiline_comment = "\n{indent}       " + " " * len(self._name) + "  {comment}"
 
     @property
     def has_comment(self):
         return bool(self._comment)
 
+    @classmethod
+    def render(cls, name: str, comment: List[str], indentation: int, indentation_str: str) -> str:
+        """Renders comment of a field without creating a node for it"""
+        if not comment:
+            return ""
+        prefix = indent(indentation_str, indentation)
+        rendered = cls.TEMPLATE.format(name=name, comment=comment[0], indent=prefix)
+        if len(comment) > 1:
+            name_padding = " " * len(name)
+            rendered += "".join(cls.LINE_TEMPLATE.format(indent=prefix, name_padding=name_padding, comment=line)
+                                for line in comment[1:])
+        return rendered
+
     def generate(self, indentation: int, indentation_str: str) -> str:
-        return self.TEMPLATE.format(
-            name=self._name,
-            comment=self._comment[0],
-            multiline_comment=(
-                "".join(self._multiline_comment.format(comment) for comment in self._comment[1:])
-                if self._comment else
-                ""
-            ),
-            indent=indentation_str * indentation
-        ) if self._comment else ""
+        return self.render(self._name, self._comment, indentation, indentation_str)
 
 
 class ConstructorParameter(FieldType):
+    __slots__ = ('_type', '_name', '_comment')
     TEMPLATE = """{name}: {type} = None"""
 
     def __init__(self, value_type: FieldType, name: str, comment: List[str]):
@@ -68,6 +79,14 @@ class ConstructorParameter(FieldType):
         self._name = name
         self._comment = comment
 
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def comment(self) -> List[str]:
+        return self._comment
+
     def to_field(self) -> Field:
         return Field(None, "self.{}".format(self._name), self._name)
 
@@ -81,56 +100,63 @@ class ConstructorParameter(FieldType):
         )
 
 
-class Constructor(CodePart):
-    TEMPLATE = """\
-{indent}def __init__(self{args}):{comments}
-{fields}
-"""
+class Constructor(CompositePart):
+    __slots__ = ('_args',)
+    HEADER_TEMPLATE = """{indent}def __init__(self"""
     ARG_SEPARATOR_TEMPLATE = """,
 {indent}             """
-
-    def __init__(self, *args: ConstructorParameter):
-        self._args = args
-
-    def generate(self, indentation: int, indentation_str: str):
-        param_separator = self.ARG_SEPARATOR_TEMPLATE.format(indent=indentation_str * indentation)
-        return self.TEMPLATE.format(
-            args=(
-                param_separator + param_separator.join(
-                    a.generate()
-                    for a in self._args
-                )
-                if self._args else
-                ""
-            ),
-            indent=indentation_str * indentation,
-            fields=(
-                "\n".join(a.to_field().generate(indentation + 1, indentation_str) for a in self._args)
-                if self._args else
-                NO_OP.generate(indentation + 1, indentation_str)
-            ),
-            comments=_Comments(*[a.to_field_comment() for a in self._args]).generate(indentation + 1, indentation_str)
-        )
-
-
-class _Comments(CodePart):
-    TEMPLATE = '''
+    # same as `Field` of `ConstructorParameter.to_field()`, rendered without creating the node
+    ASSIGNMENT_TEMPLATE = """{indent}self.{name} = {name}"""
+
+    def __init__(self, args: Iterable[ConstructorParameter]):
+        self._args = tuple(args)
+
+    def write(self, out: TextIO, indentation: int, indentation_str: str):
+        prefix = indent(indentation_str, indentation)
+        out.write(self.HEADER_TEMPLATE.format(indent=prefix))
+        param_separator = self.ARG_SEPARATOR_TEMPLATE.format(indent=prefix)
+        for a in self._args:
+            out.write(param_separator)
+            out.write(a.generate())
+        out.write("):")
+        _write_comments(out, self._args, indentation + 1, indentation_str)
+        out.write("\n")
+        if self._args:
+            inner_prefix = indent(indentation_str, indentation + 1)
+            for i, a in enumerate(self._args):
+                if i:
+                    out.write("\n")
+                out.write(self.ASSIGNMENT_TEMPLATE.format(indent=inner_prefix, name=a.name))
+        else:
+            NO_OP.write(out, indentation + 1, indentation_str)
+        out.write("\n")
+
+
+_COMMENTS_HEADER_TEMPLATE = Template('''
 {indent}"""
-{args}
-{indent}"""\
-'''
-
-    def __init__(self, *args: FieldComment):
-        self._args = args
-
-    def generate(self, indentation: int, indentation_str: str) -> str:
-        return self.TEMPLATE.format(
-            args="\n".join(a.generate(indentation, indentation_str) for a in self._args if a.has_comment),
-            indent=indentation_str * indentation
-        ) if any(a.has_comment for a in self._args) else ""
+''')
+_COMMENTS_FOOTER_TEMPLATE = Template('''
+{indent}"""''')
+
+
+def _write_comments(out: TextIO, args: Sequence[ConstructorParameter], indentation: int, indentation_str: str):
+    """Writes docstring with comments of constructor parameters, if any of them has a comment"""
+    first = True
+    for a in args:
+        if not a.comment:
+            continue
+        if first:
+            out.write(_COMMENTS_HEADER_TEMPLATE.format(indent=indent(indentation_str, indentation)))
+            first = False
+        else:
+            out.write("\n")
+        out.write(FieldComment.render(a.name, a.comment, indentation, indentation_str))
+    if not first:
+        out.write(_COMMENTS_FOOTER_TEMPLATE.format(indent=indent(indentation_str, indentation)))
 
 
 class _MessageImplementation(CodePart):
+    __slots__ = ('_class_path',)
     TEMPLATE = """\
 {indent}# region <<<Message Implementation>>>
 {indent}def __eq__(self, other_msg: '{class_path}') -> bool: ...
@@ -160,36 +186,90 @@ class _MessageImplementation(CodePart):
     def __init__(self, class_path: str):
         self._class_path = class_path
 
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _template(cls, indentation: int, indentation_str: str) -> Template:
+        """Template with indentation already filled in, the block is the same for all messages
+           on the same level except of the class path"""
+        return Template(cls.TEMPLATE.replace("{indent}", indent(indentation_str, indentation)))
+
+    def generate(self, indentation: int, indentation_str: str) -> str:
+        return self._template(indentation, indentation_str).format(class_path=self._class_path)
+
+
+class CompactMessageBase(CodePart):
+    """Base of messages in compact stubs, it declares only methods typed to the concrete message class,
+       the rest is inherited from `google.protobuf.message.Message`
+    """
+    __slots__ = ()
+    NAME = '_CompactMessage'
+    TYPE_VAR = '_M'
+    TEMPLATE = """\
+{indent}{type_var} = TypeVar('{type_var}', bound='{name}')
+
+
+{indent}class {name}(Message):
+{inner_indent}def __eq__(self: {type_var}, other_msg: {type_var}) -> bool: ...
+{inner_indent}def MergeFrom(self: {type_var}, other_msg: {type_var}): ...
+"""
+
     def generate(self, indentation: int, indentation_str: str) -> str:
         return self.TEMPLATE.format(
-            class_path=self._class_path,
-            indent=indentation_str * indentation
+            name=self.NAME,
+            type_var=self.TYPE_VAR,
+            indent=indent(indentation_str, indentation),
+            inner_indent=indent(indentation_str, indentation + 1)
         )
 
 
-class Message(CodePart):
-    TEMPLATE = """\
-{indent}class {class_name}(Message):
-{fields}
+class Message(CompositePart):
+    __slots__ = ('_name', '_parent_path', '_base', '_inner', '_footer')
+    HEADER_TEMPLATE = """\
+{indent}class {class_name}({base}):
 """
 
-    def __init__(self, name: str, parents: List[str], *inner: CodePart):
+    def __init__(self, name: str, parents: List[str], inner: Iterable[CodePart], compact: bool = False):
         self._name = name
         self._parent_path = ".".join(parents) + ("." if parents else "")
+        # compact message derives from `CompactMessageBase` instead of repeating the implementation block
+        self._base = CompactMessageBase.NAME if compact else "Message"
         self._inner = list(inner)
-        self._inner.append(NEW_LINE)
-        self._inner.append(_MessageImplementation(self._parent_path + self._name))
-
-    def generate(self, indentation: int, indentation_str: str) -> str:
-        return self.TEMPLATE.format(
+        # constructor ends with a new line, the implementation block does not
+        self._footer = ""
+        if not compact:
+            self._inner.append(NEW_LINE)
+            self._inner.append(_MessageImplementation(self._parent_path + self._name))
+            self._footer = "\n"
+
+    def _write_header(self, out: TextIO, indentation: int, indentation_str: str):
+        out.write(self.HEADER_TEMPLATE.format(
             class_name=self._name,
-            parent_path=self._parent_path,
-            fields="".join(i.generate(indentation + 1, indentation_str) for i in self._inner),
-            indent=indentation_str * indentation
-        )
+            base=self._base,
+            indent=indent(indentation_str, indentation)
+        ))
+
+    def write(self, out: TextIO, indentation: int, indentation_str: str):
+        """Writes the message with all nested messages, they are written iteratively,
+           so deeply nested messages do not hit the recursion limit
+        """
+        self._write_header(out, indentation, indentation_str)
+        # parts of messages being written with indentation of the parts and footer of their message
+        stack = [(iter(self._inner), indentation + 1, self._footer)]
+        while stack:
+            parts, inner_indentation, footer = stack[-1]
+            for part in parts:
+                if type(part) is Message:
+                    part._write_header(out, inner_indentation, indentation_str)
+                    stack.append((iter(part._inner), inner_indentation + 1, part._footer))
+                    break
+                part.write(out, inner_indentation, indentation_str)
+            else:
+                stack.pop()
+                out.write(footer)
 
 
 class Import(CodePart):
+    __slots__ = ('_path', '_items', '_from_items', 'sort_key')
     IMPORT_FROM_TEMPLATE = """\
 {indent}from {path} import {items}
 """
@@ -207,58 +287,41 @@ class Import(CodePart):
         if '/' in path:
             path = path.replace('/', '.')
         self._path = path
+        self._items = list(items) if items else []
         self._from_items = ", ".join(items) if items else None
+        # imports are sorted by their text, so it is computed only once
+        self.sort_key = self.generate(0, '')
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def items(self) -> List[str]:
+        return self._items
 
     def generate(self, indentation: int, indentation_str: str) -> str:
         if self._from_items:
             return self.IMPORT_FROM_TEMPLATE.format(
                 path=self._path,
                 items=self._from_items,
-                indent=indentation_str * indentation
+                indent=indent(indentation_str, indentation)
             )
         return self.IMPORT_TEMPLATE.format(
             path=self._path,
-            indent=indentation_str * indentation
+            indent=indent(indentation_str, indentation)
         )
 
-    def __contains__(self, item: 'Union[Import, str]'):
-        if isinstance(item, Import):
-            return item._path == self._path and (
-                    not self._from_items or all(i in self._from_items for i in item._from_items))
-        elif isinstance(item, str):
-            path, name = item.split('.')[1:]
-            return path == self._path and (not self._from_items or name in self._from_items)
-
-    # region <<<Comparison operators for sorting>>>
-    def __lt__(self, other: 'Import') -> bool:
-        return self.generate(0, '') < other.generate(0, '')
-
-    def __gt__(self, other: 'Import') -> bool:
-        return self.generate(0, '') > other.generate(0, '')
-
-    def __eq__(self, other: 'Import') -> bool:
-        return self.generate(0, '') == other.generate(0, '')
-
-    def __le__(self, other: 'Import') -> bool:
-        return self.generate(0, '') <= other.generate(0, '')
 
-    def __ge__(self, other: 'Import') -> bool:
-        return self.generate(0, '') >= other.generate(0, '')
-
-    def __ne__(self, other: 'Import') -> bool:
-        return self.generate(0, '') != other.generate(0, '')
-
-    # endregion
-    ...
-
-
-class File(CodePart):
-    """File holds all parts together and its generate method will run recursive
-       stub generation with certain indentation
+class File(CompositePart):
+    """File holds all parts together and its write method will run recursive
+       stub generation with certain indentation into the output
     """
+    __slots__ = ('_inners',)
 
-    def __init__(self, *inners: CodePart):
+    def __init__(self, inners: Iterable[CodePart]):
         self._inners = list(inners)
 
-    def generate(self, indentation: int, indentation_str: str) -> str:
-        return "".join(i.generate(indentation, indentation_str) for i in self._inners)
+    def write(self, out: TextIO, indentation: int, indentation_str: str):
+        for i in self._inners:
+            i.write(out, indentation, indentation_str)
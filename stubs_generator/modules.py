@@ -0,0 +1,103 @@
+import ast
+import importlib
+import os
+import pkgutil
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from google.protobuf import descriptor_pool
+from google.protobuf.descriptor_pb2 import FileDescriptorProto
+
+from stubs_generator.symbols import proto_module
+
+
+def _serialized_literal(node: ast.AST) -> Optional[bytes]:
+    """Returns serialized descriptor from `b'...'` or `_b('...')` (protoc < 3.6) expression"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, bytes):
+        return node.value
+    if isinstance(node, ast.Call) and len(node.args) == 1 and isinstance(node.args[0], ast.Constant) \
+            and isinstance(node.args[0].value, str):
+        return node.args[0].value.encode('latin1')
+    return None
+
+
+def scan_source(source: str) -> Optional[bytes]:
+    """Finds serialized file descriptor in source of `_pb2` module without importing it"""
+    for node in ast.walk(ast.parse(source)):
+        if not isinstance(node, ast.Call):
+            continue
+        # `_descriptor_pool.Default().AddSerializedFile(b'...')`
+        if isinstance(node.func, ast.Attribute) and node.func.attr == 'AddSerializedFile' and node.args:
+            serialized = _serialized_literal(node.args[0])
+            if serialized is not None:
+                return serialized
+        # `_descriptor.FileDescriptor(..., serialized_pb=_b('...'))`
+        for keyword in node.keywords:
+            if keyword.arg == 'serialized_pb':
+                serialized = _serialized_literal(keyword.value)
+                if serialized is not None:
+                    return serialized
+    return None
+
+
+def scan_sources(root: str) -> Iterator[FileDescriptorProto]:
+    """Yields descriptors of all `_pb2.py` modules in the directory tree"""
+    for directory, _, file_names in sorted(os.walk(root)):
+        for file_name in sorted(file_names):
+            if not file_name.endswith('_pb2.py'):
+                continue
+            path = os.path.join(directory, file_name)
+            with open(path, encoding='utf-8') as f:
+                serialized = scan_source(f.read())
+            if serialized is None:
+                print("warning: no serialized descriptor found in {}".format(path), file=sys.stderr)
+                continue
+            yield FileDescriptorProto.FromString(serialized)
+
+
+def import_package(package: str) -> Iterator[FileDescriptorProto]:
+    """Imports the package with all its `_pb2` submodules and yields their descriptors"""
+    module = importlib.import_module(package)
+    names = [package] + [info.name for info in pkgutil.walk_packages(getattr(module, '__path__', []), package + '.')]
+    for name in names:
+        if not name.endswith('_pb2'):
+            continue
+        descriptor = getattr(importlib.import_module(name), 'DESCRIPTOR', None)
+        if descriptor is not None:
+            yield FileDescriptorProto.FromString(descriptor.serialized_pb)
+
+
+def _find_in_default_pool(name: str) -> Optional[FileDescriptorProto]:
+    """Looks up proto file in the default descriptor pool, its `_pb2` module is imported if it is installed"""
+    pool = descriptor_pool.Default()
+    try:
+        file_descriptor = pool.FindFileByName(name)
+    except KeyError:
+        try:
+            importlib.import_module(proto_module(name))
+            file_descriptor = pool.FindFileByName(name)
+        except (ImportError, KeyError):
+            return None
+    proto_file = FileDescriptorProto()
+    file_descriptor.CopyToProto(proto_file)
+    return proto_file
+
+
+def resolve_dependencies(proto_files: Iterable[FileDescriptorProto]) -> List[FileDescriptorProto]:
+    """Returns descriptors of all files imported by given files which are not among them, these are looked up
+       in the default descriptor pool (e.g. well-known types of installed protobuf)
+    """
+    known: Dict[str, FileDescriptorProto] = {proto_file.name: proto_file for proto_file in proto_files}
+    stack = [dependency for proto_file in known.values() for dependency in proto_file.dependency]
+    dependencies = []
+    while stack:
+        name = stack.pop()
+        if name in known:
+            continue
+        proto_file = known[name] = _find_in_default_pool(name)
+        if proto_file is None:
+            print("warning: {} was not found, its types will not be imported".format(name), file=sys.stderr)
+            continue
+        dependencies.append(proto_file)
+        stack.extend(proto_file.dependency)
+    return dependencies
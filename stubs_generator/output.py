@@ -0,0 +1,40 @@
+import json
+import os
+from typing import List
+
+
+def write_stub(out_dir: str, name: str, content: str) -> bool:
+    """Writes stub file into output directory (`name` is relative to it) unless the file there has the same content,
+       so its modification time and caches of type checkers depending on it stay valid.
+       Returns whether the file was written.
+    """
+    path = os.path.join(out_dir, name)
+    data = content.encode('utf-8')
+    try:
+        # size is compared first, so changed files are mostly detected without reading them
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+
+def stub_module(name: str) -> str:
+    """Converts name of a stub file (`a/b_pb2.pyi`) to its module (`a.b_pb2`)"""
+    return os.path.splitext(name)[0].replace('/', '.')
+
+
+def write_manifest(path: str, changed: List[str], unchanged: List[str]):
+    """Writes JSON manifest listing written and unchanged stub files and modules of the written ones"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'changed': changed,
+            'unchanged': unchanged,
+            'changed_modules': [stub_module(name) for name in changed],
+        }, f, indent=2)
+        f.write("\n")
@@ -0,0 +1,317 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from google.protobuf.compiler import plugin_pb2
+from google.protobuf.descriptor_pb2 import FileDescriptorProto
+
+from stubs_generator.cache import DEFAULT_MAX_SIZE, StubCache, cache_key
+from stubs_generator.generator import generate_pb2_grpc_stub_file_content, generate_pb2_stub_file_content
+from stubs_generator.profiling import RunProfiler, request_parameter
+from stubs_generator.request import scan_request
+from stubs_generator.symbols import SymbolTable
+from stubs_generator.tracing import read_request, span, start_tracing, stop_tracing
+from stubs_generator.utils import get_comments
+from stubs_generator.wire import encode_length_delimited
+
+# Stub files which can be generated for a proto file: suffix of the file name and function generating its content
+TARGETS = {
+    'messages': ("_pb2.pyi", generate_pb2_stub_file_content),
+    'compact_messages': ("_pb2.pyi", partial(generate_pb2_stub_file_content, compact=True)),
+    'grpc': ("_pb2_grpc.pyi", generate_pb2_grpc_stub_file_content),
+}
+
+# Values of `target` plugin parameter
+TARGET_CHOICES = {
+    'messages': ('messages',),
+    'grpc': ('grpc',),
+    'both': ('messages', 'grpc'),
+}
+
+# Targets replaced by their compact variant with `compact` parameter
+COMPACT_TARGETS = {
+    'messages': 'compact_messages',
+}
+
+# Values of boolean plugin parameters, flag without a value is true
+FLAG_VALUES = {
+    '': True, 'true': True, '1': True, 'yes': True,
+    'false': False, '0': False, 'no': False,
+}
+
+
+# Field numbers of `CodeGeneratorResponse` and its `File` used by the streamed response
+RESPONSE_ERROR_FIELD = 1
+RESPONSE_FILE_FIELD = 15
+FILE_NAME_FIELD = 1
+FILE_CONTENT_FIELD = 15
+
+# Requests with less files are generated serially, starting of the process pool would take longer
+PARALLEL_MIN_FILES = 16
+
+
+class PluginError(Exception):
+    """Error in plugin usage, it is reported back to protoc instead of a traceback"""
+
+
+def parse_parameter(parameter: str) -> Dict[str, str]:
+    """Parses plugin parameter (`--{plugin}_out=key=value,flag:out_dir`) into dictionary,
+       flags without a value are mapped to empty string
+    """
+    options = {}
+    for option in parameter.split(','):
+        key, _, value = option.partition('=')
+        if key.strip():
+            options[key.strip()] = value.strip()
+    return options
+
+
+def get_flag(options: Dict[str, str], name: str) -> bool:
+    """Returns value of boolean parameter, it is false when it is not present"""
+    if name not in options:
+        return False
+    try:
+        return FLAG_VALUES[options[name].lower()]
+    except KeyError:
+        raise PluginError("{} must be true or false, got '{}'".format(name, options[name]))
+
+
+def compact_targets(targets: Tuple[str, ...]) -> Tuple[str, ...]:
+    return tuple(COMPACT_TARGETS.get(target, target) for target in targets)
+
+
+def get_targets(options: Dict[str, str], default_target: str) -> Tuple[str, ...]:
+    """Returns stub files selected by `target` and `compact` parameters"""
+    target = options.get('target', default_target)
+    try:
+        targets = TARGET_CHOICES[target]
+    except KeyError:
+        raise PluginError("unknown target '{}', expected one of: {}".format(target, ", ".join(TARGET_CHOICES)))
+    return compact_targets(targets) if get_flag(options, 'compact') else targets
+
+
+def generate_file(proto_file: FileDescriptorProto, symbols: SymbolTable, targets: Tuple[str, ...],
+                  comments: Dict[str, List[str]] = None) -> List[Tuple[str, str]]:
+    """Generates stub files selected by `targets` for a proto file, comments are retrieved only once for all of them"""
+    with span(proto_file.name):
+        if comments is None:
+            with span('get_comments'):
+                comments = get_comments(proto_file)
+        files = []
+        for target in targets:
+            suffix, generate_content = TARGETS[target]
+            with span(target):
+                files.append((proto_file.name[:-6] + suffix, generate_content(proto_file, symbols, comments)))
+    return files
+
+
+def get_jobs(options: Dict[str, str]) -> int:
+    """Returns count of processes selected by `jobs` parameter"""
+    try:
+        jobs = int(options.get('jobs', 1))
+    except ValueError:
+        raise PluginError("jobs must be a number, got '{}'".format(options['jobs']))
+    if jobs < 1:
+        raise PluginError("jobs must be at least 1, got {}".format(jobs))
+    return jobs
+
+
+def get_cache(options: Dict[str, str], cwd: str = None) -> Optional[StubCache]:
+    """Returns cache of rendered stubs selected by `cache_dir` and `cache_max_size` (in MiB) parameters,
+       relative `cache_dir` is resolved against `cwd` of protoc when the request is not generated in its process
+    """
+    if not options.get('cache_dir'):
+        return None
+    try:
+        max_size = int(options.get('cache_max_size', DEFAULT_MAX_SIZE))
+    except ValueError:
+        raise PluginError("cache_max_size must be a number, got '{}'".format(options['cache_max_size']))
+    return StubCache(os.path.join(cwd, options['cache_dir']) if cwd else options['cache_dir'], max_size)
+
+
+# Symbol table and targets of a worker process, these are sent to each worker only once
+_worker_state: Tuple[SymbolTable, Tuple[str, ...]] = None
+
+
+def _init_worker(symbols: SymbolTable, targets: Tuple[str, ...]):
+    global _worker_state
+    _worker_state = symbols, targets
+
+
+def _generate_serialized_file(serialized_proto_file: bytes) -> Tuple[List[Tuple[str, str]], float]:
+    symbols, targets = _worker_state
+    return _generate_timed(FileDescriptorProto.FromString(serialized_proto_file), symbols, targets)
+
+
+def _generate_timed(proto_file: FileDescriptorProto, symbols: SymbolTable,
+                    targets: Tuple[str, ...]) -> Tuple[List[Tuple[str, str]], float]:
+    start = time.perf_counter()
+    files = generate_file(proto_file, symbols, targets)
+    return files, time.perf_counter() - start
+
+
+def generate_file_lists(proto_files: List[FileDescriptorProto], symbols: SymbolTable, targets: Tuple[str, ...],
+                        jobs: int = 1) -> Iterator[Tuple[List[Tuple[str, str]], float]]:
+    """Yields stub files of each proto file in their order with time spent by generating them, files are generated
+       on a pool of `jobs` processes when there is enough of them to pay off starting it
+    """
+    if jobs <= 1 or len(proto_files) < PARALLEL_MIN_FILES:
+        for proto_file in proto_files:
+            yield _generate_timed(proto_file, symbols, targets)
+        return
+
+    jobs = min(jobs, len(proto_files))
+    with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(symbols, targets)) as executor:
+        yield from executor.map(_generate_serialized_file,
+                                [proto_file.SerializeToString() for proto_file in proto_files],
+                                chunksize=max(1, len(proto_files) // (jobs * 4)))
+
+
+def generate_files(proto_files: List[FileDescriptorProto], symbols: SymbolTable, targets: Tuple[str, ...],
+                   jobs: int = 1, cache: StubCache = None) -> Iterator[Tuple[str, str]]:
+    """Generates stub files for proto files in their order, stubs found in `cache` are not generated again"""
+    if cache is None:
+        for files, _ in generate_file_lists(proto_files, symbols, targets, jobs):
+            yield from files
+        return
+
+    keys = [cache_key(proto_file, symbols, targets) for proto_file in proto_files]
+    cached = [key in cache for key in keys]
+    generated = generate_file_lists([proto_file for proto_file, hit in zip(proto_files, cached) if not hit],
+                                    symbols, targets, jobs)
+    for proto_file, key, hit in zip(proto_files, keys, cached):
+        files = cache.get(key) if hit else None
+        if files is None:
+            # entry evicted by other run after the check above is generated here
+            files = next(generated)[0] if not hit else generate_file(proto_file, symbols, targets)
+            cache.put(key, files)
+        yield from files
+    cache.evict()
+
+
+def request_files(request: plugin_pb2.CodeGeneratorRequest, default_target: str,
+                  cwd: str = None) -> Iterator[Tuple[str, str]]:
+    """Returns iterator over stub files generated for proto files of the request which should be generated,
+       raises `PluginError` for invalid parameters before any file is generated; relative paths in parameters
+       are resolved against `cwd`, the working directory of protoc, when it is given
+    """
+    options = parse_parameter(request.parameter)
+    targets = get_targets(options, default_target)
+    jobs = get_jobs(options)
+    cache = get_cache(options, cwd)
+    # `stream` is applied by `main`, it is validated here so an invalid value is reported in the response
+    get_flag(options, 'stream')
+
+    # Index messages and enums of all files, so references between them can be resolved
+    with span('symbol table'):
+        symbols = SymbolTable(request.proto_file)
+
+    file_to_generate = set(request.file_to_generate)
+    proto_files = [proto_file for proto_file in request.proto_file if proto_file.name in file_to_generate]
+    return generate_files(proto_files, symbols, targets, jobs, cache)
+
+
+def generate(request: plugin_pb2.CodeGeneratorRequest, default_target: str,
+             cwd: str = None) -> plugin_pb2.CodeGeneratorResponse:
+    """Generates stub files for all proto files from request which should be generated"""
+    response = plugin_pb2.CodeGeneratorResponse()
+    try:
+        files = request_files(request, default_target, cwd)
+    except PluginError as ex:
+        response.error = str(ex)
+        return response
+
+    for name, content in files:
+        response.file.add(name=name, content=content)
+    return response
+
+
+def encode_response_file(name: str, content: str) -> bytes:
+    """Encodes stub file as `file` field of `CodeGeneratorResponse`"""
+    return encode_length_delimited(
+        RESPONSE_FILE_FIELD,
+        encode_length_delimited(FILE_NAME_FIELD, name.encode('utf-8'))
+        + encode_length_delimited(FILE_CONTENT_FIELD, content.encode('utf-8'))
+    )
+
+
+def generate_stream(request: plugin_pb2.CodeGeneratorRequest, default_target: str) -> Iterator[bytes]:
+    """Yields serialized response in parts, each stub file is encoded as soon as it is generated,
+       concatenated parts are the same message as serialized response of `generate`
+    """
+    try:
+        files = request_files(request, default_target)
+    except PluginError as ex:
+        yield encode_length_delimited(RESPONSE_ERROR_FIELD, str(ex).encode('utf-8'))
+        return
+
+    for name, content in files:
+        with span('serialize response', file=name):
+            part = encode_response_file(name, content)
+        yield part
+
+
+def generate_serialized(data: bytes, default_target: str, cwd: str = None) -> bytes:
+    """Generates serialized response for serialized request, `cwd` is working directory of protoc
+       when it is not the working directory of this process
+    """
+    # Parse request, imported files only as far as their names are needed
+    request = scan_request(data)
+
+    # Create response
+    response = generate(request, default_target, cwd)
+
+    # Serialise response message
+    return response.SerializeToString()
+
+
+def main(default_target: str, data: bytes = None):
+    """Runs the plugin, `default_target` selects generated stubs when there is no `target` parameter,
+       request is read from stdin unless it was already read into `data`
+    """
+    # Read request message from stdin
+    if data is None:
+        data = read_request()
+
+    # Profiling and tracing start before the request is parsed, so only its parameter is read first
+    options = parse_parameter(request_parameter(data))
+    start_tracing(options, "python_typings plugin ({})".format(default_target))
+    profiler = RunProfiler(options)
+    profiler.start()
+
+    with span('parse request'):
+        request = scan_request(data)
+
+    try:
+        stream = get_flag(options, 'stream')
+    except PluginError:
+        # the response is not streamed, `request_files` reports the error in it
+        stream = False
+
+    if stream:
+        # Write every file to stdout as soon as it is generated, so only one of them is kept in memory
+        for part in generate_stream(request, default_target):
+            with span('write response'):
+                sys.stdout.buffer.write(part)
+        report = profiler.stop()
+        if report is not None:
+            sys.stdout.buffer.write(encode_response_file(*report))
+        stop_tracing()
+        return
+
+    response = generate(request, default_target)
+    report = profiler.stop()
+    if report is not None:
+        response.file.add(name=report[0], content=report[1])
+
+    with span('serialize response'):
+        data = response.SerializeToString()
+
+    # Write to stdout
+    with span('write response'):
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+    stop_tracing()
@@ -0,0 +1,84 @@
+# Profiling of plugin runs by `cProfile`. protoc owns stdin and stdout of the plugin, so the stats are written
+# into a file given by `profile` parameter or `PROTOC_GEN_PYTHON_TYPINGS_PROFILE` environment variable, or added
+# to the response as a text report with `profile_report` parameter. The module is imported by the daemon client,
+# so it must not import `google.protobuf`, and profilers are imported only when they are used.
+import io
+import os
+import sys
+from typing import Callable, Dict, Optional, Tuple
+
+from stubs_generator.wire import scan_length_delimited
+
+# Environment variable with path of the stats file, used when there is no `profile` parameter
+PROFILE_ENV = 'PROTOC_GEN_PYTHON_TYPINGS_PROFILE'
+PROFILE_PARAMETERS = ('profile', 'profile_report')
+
+# Field number of `parameter` of `CodeGeneratorRequest`
+_REQUEST_PARAMETER = 2
+_REQUEST_PARAMETER_FIELDS = frozenset((_REQUEST_PARAMETER,))
+
+
+def request_parameter(data: bytes) -> str:
+    """Reads `parameter` of serialized `CodeGeneratorRequest` without parsing the rest of it"""
+    for _, start, end in scan_length_delimited(data, _REQUEST_PARAMETER_FIELDS):
+        return data[start:end].decode('utf-8')
+    return ""
+
+
+def profiling_requested(data: bytes) -> bool:
+    """Returns whether the serialized request should be profiled, such requests are not sent to the daemon"""
+    if os.environ.get(PROFILE_ENV):
+        return True
+    return any(option.partition('=')[0].strip() in PROFILE_PARAMETERS
+               for option in request_parameter(data).split(','))
+
+
+def write_diagnostic(path: str, kind: str, write: Callable[[str], None]):
+    """Writes file with diagnostics of the run (profile or trace) by `write`, its directory is created when
+       it does not exist. Diagnostics must not fail the plugin, so a file which cannot be written is reported
+       on stderr
+    """
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        write(path)
+    except OSError as ex:
+        print("python_typings: cannot write {}: {}".format(kind, ex), file=sys.stderr)
+
+
+class RunProfiler:
+    """Profiles a plugin run when it is requested by plugin parameters or the environment, `{pid}` in the path
+       of the stats file is replaced by id of the process, so parallel runs do not overwrite stats of each other
+    """
+    __slots__ = ('_path', '_report_name', '_profile')
+
+    def __init__(self, options: Dict[str, str]):
+        path = options.get('profile') or os.environ.get(PROFILE_ENV)
+        self._path = path.replace('{pid}', str(os.getpid())) if path else None
+        self._report_name = options.get('profile_report') or None
+        self._profile = None
+        if self._path or self._report_name:
+            import cProfile
+            self._profile = cProfile.Profile()
+
+    def start(self):
+        if self._profile is not None:
+            self._profile.enable()
+
+    def stop(self) -> Optional[Tuple[str, str]]:
+        """Stops profiling and writes the stats, returns name and content of the text report
+           when it should be added to the response
+        """
+        if self._profile is None:
+            return None
+        self._profile.disable()
+        if self._path:
+            write_diagnostic(self._path, 'profile', self._profile.dump_stats)
+        if not self._report_name:
+            return None
+        # content of response files is text, so the binary stats are added as the report of `pstats`
+        import pstats
+        report = io.StringIO()
+        pstats.Stats(self._profile, stream=report).sort_stats(pstats.SortKey.CUMULATIVE).print_stats()
+        return self._report_name, report.getvalue()
@@ -0,0 +1,99 @@
+# Lazy reading of serialized `CodeGeneratorRequest`. Only files which are generated are parsed completely,
+# imported files are needed only for resolution of names, so just their names, package, imports and names
+# of their messages, enums and services are read. Everything else (fields, options, source info) is skipped
+# in the wire format without being decoded.
+from google.protobuf.compiler import plugin_pb2
+from google.protobuf.descriptor_pb2 import FileDescriptorProto
+
+from stubs_generator.wire import scan_length_delimited
+
+# Field numbers of `CodeGeneratorRequest`
+_FILE_TO_GENERATE = 1
+_PARAMETER = 2
+_COMPILER_VERSION = 3
+_PROTO_FILE = 15
+_REQUEST_FIELDS = frozenset((_FILE_TO_GENERATE, _PARAMETER, _COMPILER_VERSION, _PROTO_FILE))
+
+# Field numbers of `FileDescriptorProto`
+_FILE_NAME = 1
+_FILE_PACKAGE = 2
+_FILE_DEPENDENCY = 3
+_FILE_MESSAGE_TYPE = 4
+_FILE_ENUM_TYPE = 5
+_FILE_SERVICE = 6
+_FILE_FIELDS = frozenset((_FILE_NAME, _FILE_PACKAGE, _FILE_DEPENDENCY, _FILE_MESSAGE_TYPE, _FILE_ENUM_TYPE,
+                          _FILE_SERVICE))
+
+# Field numbers of `DescriptorProto`, name is the first field of enums and services too
+_NAME = 1
+_MESSAGE_NESTED_TYPE = 3
+_MESSAGE_ENUM_TYPE = 4
+_MESSAGE_FIELDS = frozenset((_NAME, _MESSAGE_NESTED_TYPE, _MESSAGE_ENUM_TYPE))
+_NAME_FIELDS = frozenset((_NAME,))
+
+
+def _decode(data: bytes, start: int, end: int) -> str:
+    return data[start:end].decode('utf-8')
+
+
+def _name(data: bytes, start: int, end: int) -> str:
+    """Reads name of serialized file, message, enum or service, it is their first field"""
+    for _, name_start, name_end in scan_length_delimited(data, _NAME_FIELDS, start, end):
+        return _decode(data, name_start, name_end)
+    return ""
+
+
+def read_skeleton(proto_file: FileDescriptorProto, data: bytes, start: int = 0, end: int = None):
+    """Reads into `proto_file` only names of serialized file descriptor needed by the symbol table"""
+    messages = []
+    for number, field_start, field_end in scan_length_delimited(data, _FILE_FIELDS, start, end):
+        if number == _FILE_NAME:
+            proto_file.name = _decode(data, field_start, field_end)
+        elif number == _FILE_PACKAGE:
+            proto_file.package = _decode(data, field_start, field_end)
+        elif number == _FILE_DEPENDENCY:
+            proto_file.dependency.append(_decode(data, field_start, field_end))
+        elif number == _FILE_MESSAGE_TYPE:
+            messages.append((proto_file.message_type.add(), field_start, field_end))
+        elif number == _FILE_ENUM_TYPE:
+            proto_file.enum_type.add(name=_name(data, field_start, field_end))
+        elif number == _FILE_SERVICE:
+            proto_file.service.add(name=_name(data, field_start, field_end))
+
+    # nested messages are read iteratively, added messages are already in their place in the tree
+    while messages:
+        msg, msg_start, msg_end = messages.pop()
+        for number, field_start, field_end in scan_length_delimited(data, _MESSAGE_FIELDS, msg_start, msg_end):
+            if number == _NAME:
+                msg.name = _decode(data, field_start, field_end)
+            elif number == _MESSAGE_NESTED_TYPE:
+                messages.append((msg.nested_type.add(), field_start, field_end))
+            elif number == _MESSAGE_ENUM_TYPE:
+                msg.enum_type.add(name=_name(data, field_start, field_end))
+
+
+def scan_request(data: bytes) -> plugin_pb2.CodeGeneratorRequest:
+    """Parses serialized request, files which are not generated contain only names needed by the symbol table
+       (see `read_skeleton`)
+    """
+    request = plugin_pb2.CodeGeneratorRequest()
+    proto_files = []
+    for number, start, end in scan_length_delimited(data, _REQUEST_FIELDS):
+        if number == _FILE_TO_GENERATE:
+            request.file_to_generate.append(_decode(data, start, end))
+        elif number == _PARAMETER:
+            request.parameter = _decode(data, start, end)
+        elif number == _COMPILER_VERSION:
+            request.compiler_version.MergeFromString(data[start:end])
+        elif number == _PROTO_FILE:
+            proto_files.append((start, end))
+
+    file_to_generate = set(request.file_to_generate)
+    with memoryview(data) as view:
+        for start, end in proto_files:
+            proto_file = request.proto_file.add()
+            if _name(data, start, end) in file_to_generate:
+                proto_file.ParseFromString(view[start:end])
+            else:
+                read_skeleton(proto_file, data, start, end)
+    return request
@@ -1,9 +1,10 @@
-from typing import List
+from typing import Iterable, List, TextIO
 
-from .base import CodePart, FieldType, NO_OP
+from .base import CodePart, CompositePart, FieldType, NO_OP, indent
 
 
 class _Comments(CodePart):
+    __slots__ = ('_comments',)
     TEMPLATE = '''\
 {indent}"""{comment}"""
 '''
@@ -12,16 +13,26 @@ class _Comments(CodePart):
         self._comments = comments
 
     def generate(self, indentation: int, indentation_str: str) -> str:
+        prefix = indent(indentation_str, indentation)
         return self.TEMPLATE.format(
             comment=(
-                ("\n" + indentation_str * indentation + "   ").join(self._comments)
-                + ("\n" + indentation_str * indentation if len(self._comments) > 1 else "")
+                ("\n" + prefix + "   ").join(self._comments)
+                + ("\n" + prefix if len(self._comments) > 1 else "")
             ),
-            indent=indentation_str * indentation
+            indent=prefix
         )
 
 
+def _write_methods(out: TextIO, methods: List[CodePart], indentation: int, indentation_str: str):
+    """Writes methods of a class separated by empty line"""
+    for i, meth in enumerate(methods):
+        if i:
+            out.write("\n")
+        meth.write(out, indentation, indentation_str)
+
+
 class StubMethod(CodePart):
+    __slots__ = ('_name', '_arg_type', '_return_type', '_comments')
     TEMPLATE = """\
 {indent}def {name}(self,
 {indent}    {name_padding} request: {arg_type},
@@ -43,13 +54,14 @@ class StubMethod(CodePart):
             name=self._name,
             arg_type=self._arg_type.generate(),
             return_type=self._return_type.generate(),
-            indent=indentation_str * indentation,
+            indent=indent(indentation_str, indentation),
             comments=(self._comments or NO_OP).generate(indentation + 1, indentation_str),
             name_padding=" " * len(self._name)
         )
 
 
 class AbstractMethod(CodePart):
+    __slots__ = ('_name', '_arg_type', '_return_type', '_comments')
     TEMPLATE = """\
 {indent}@abstractmethod    
 {indent}def {name}(self,
@@ -70,59 +82,60 @@ class AbstractMethod(CodePart):
             name=self._name,
             arg_type=self._arg_type.generate(),
             return_type=self._return_type.generate(),
-            indent=indentation_str * indentation,
+            indent=indent(indentation_str, indentation),
             comments=(self._comments or NO_OP).generate(indentation + 1, indentation_str),
             name_padding=" " * len(self._name)
         )
 
 
-class Stub(CodePart):
-    TEMPLATE = """\
+class Stub(CompositePart):
+    __slots__ = ('_name', '_meths', '_comments')
+    HEADER_TEMPLATE = """\
 {indent}class {name}Stub(object):{comments}
 {inner_indent}def __init__(self, channel: Channel):
 {inner_indent}{noop}
-{methods}\
 """
 
-    def __init__(self, name: str, *method: StubMethod, comments: List[str] = list()):
+    def __init__(self, name: str, methods: Iterable[StubMethod], comments: List[str] = list()):
         self._name = name
-        self._meths = list(method)
+        self._meths = list(methods)
         self._comments = _Comments(comments) if comments else None
 
-    def generate(self, indentation: int, indentation_str: str) -> str:
-        return self.TEMPLATE.format(
+    def write(self, out: TextIO, indentation: int, indentation_str: str):
+        out.write(self.HEADER_TEMPLATE.format(
             name=self._name,
-            methods="\n".join(meth.generate(indentation + 1, indentation_str) for meth in self._meths),
-            indent=indentation_str * indentation,
-            inner_indent=indentation_str * (indentation + 1),
+            indent=indent(indentation_str, indentation),
+            inner_indent=indent(indentation_str, indentation + 1),
             noop=NO_OP.generate(1, indentation_str),
             comments=("\n" + self._comments.generate(indentation + 1, indentation_str)) if self._comments else ""
-        )
+        ))
+        _write_methods(out, self._meths, indentation + 1, indentation_str)
 
 
-class Servicer(CodePart):
-    TEMPLATE = """\
+class Servicer(CompositePart):
+    __slots__ = ('_name', '_meths', '_comments')
+    HEADER_TEMPLATE = """\
 {indent}class {name}Servicer(ABC):{comments}
-{methods}\
 """
 
-    def __init__(self, name: str, *method: AbstractMethod, comments: List[str] = list()):
+    def __init__(self, name: str, methods: Iterable[AbstractMethod], comments: List[str] = list()):
         self._name = name
-        self._meths = list(method)
+        self._meths = list(methods)
         if not self._meths:
             self._meths = [NO_OP]
         self._comments = _Comments(comments) if comments else None
 
-    def generate(self, indentation: int, indentation_str: str) -> str:
-        return self.TEMPLATE.format(
+    def write(self, out: TextIO, indentation: int, indentation_str: str):
+        out.write(self.HEADER_TEMPLATE.format(
             name=self._name,
-            methods="\n".join(meth.generate(indentation + 1, indentation_str) for meth in self._meths),
-            indent=indentation_str * indentation,
+            indent=indent(indentation_str, indentation),
             comments=("\n" + self._comments.generate(indentation + 1, indentation_str)) if self._comments else ""
-        )
+        ))
+        _write_methods(out, self._meths, indentation + 1, indentation_str)
 
 
 class AddToServerMethod(CodePart):
+    __slots__ = ('_name',)
     TEMPLATE = """\
 {indent}def add_{name}Servicer_to_server(servicer: {name}Servicer, server: Server):
 {indent}{noop}\
@@ -134,6 +147,6 @@ class AddToServerMethod(CodePart):
     def generate(self, indentation: int, indentation_str: str) -> str:
         return self.TEMPLATE.format(
             name=self._name,
-            indent=indentation_str * indentation,
+            indent=indent(indentation_str, indentation),
             noop=NO_OP.generate(1, indentation_str)
         )
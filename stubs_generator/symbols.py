@@ -0,0 +1,107 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from google.protobuf.descriptor_pb2 import FileDescriptorProto
+
+
+def proto_module(proto_name: str) -> str:
+    """Converts name of a proto file (`a/b.proto`) to the python module generated for it (`a.b_pb2`)"""
+    if proto_name.endswith('.proto'):
+        proto_name = proto_name[:-6]
+    return proto_name.replace('/', '.') + '_pb2'
+
+
+class Symbol(NamedTuple):
+    """Message or enum defined in a proto file"""
+    file: str
+    module: str
+    class_path: str
+    is_enum: bool
+
+
+# Well-known types shipped with protobuf: proto file -> class paths of its messages and of its enums
+_WELL_KNOWN_FILES = {
+    'google/protobuf/any.proto': (['Any'], []),
+    'google/protobuf/api.proto': (['Api', 'Method', 'Mixin'], []),
+    'google/protobuf/duration.proto': (['Duration'], []),
+    'google/protobuf/empty.proto': (['Empty'], []),
+    'google/protobuf/field_mask.proto': (['FieldMask'], []),
+    'google/protobuf/source_context.proto': (['SourceContext'], []),
+    'google/protobuf/struct.proto': (['Struct', 'Value', 'ListValue'], ['NullValue']),
+    'google/protobuf/timestamp.proto': (['Timestamp'], []),
+    'google/protobuf/type.proto': (['Type', 'Field', 'Enum', 'EnumValue', 'Option'],
+                                   ['Syntax', 'Field.Kind', 'Field.Cardinality']),
+    'google/protobuf/wrappers.proto': (['DoubleValue', 'FloatValue', 'Int64Value', 'UInt64Value', 'Int32Value',
+                                        'UInt32Value', 'BoolValue', 'StringValue', 'BytesValue'], []),
+}
+
+# Fully qualified name -> symbol of every well-known type, used when its file is not among known files
+WELL_KNOWN_TYPES: Dict[str, Symbol] = {
+    '.google.protobuf.' + class_path: Symbol(file_name, proto_module(file_name), class_path, is_enum)
+    for file_name, (messages, enums) in _WELL_KNOWN_FILES.items()
+    for class_paths, is_enum in ((messages, False), (enums, True))
+    for class_path in class_paths
+}
+
+
+class SymbolTable:
+    """Maps fully qualified names of messages and enums (as used in `type_name`, e.g. `.pkg.Outer.Inner`)
+       to the file and python module that defines them and to their class path inside of that module
+    """
+
+    def __init__(self, proto_files: Iterable[FileDescriptorProto] = ()):
+        self._symbols: Dict[str, Symbol] = {}
+        # file name -> fully qualified names of its symbols
+        self._files: Dict[str, List[str]] = {}
+        # file name -> names of files it imports
+        self._dependencies: Dict[str, List[str]] = {}
+        for pf in proto_files:
+            self.add_file(pf)
+
+    def add_file(self, pf: FileDescriptorProto):
+        module = proto_module(pf.name)
+        prefix = "." + pf.package if pf.package else ""
+        names = self._files[pf.name] = []
+        self._dependencies[pf.name] = list(pf.dependency)
+
+        def add(full_name: str, symbol: Symbol):
+            self._symbols[full_name] = symbol
+            names.append(full_name)
+
+        stack = [(prefix, "", msg) for msg in reversed(pf.message_type)]
+        for enum in pf.enum_type:
+            add(prefix + "." + enum.name, Symbol(pf.name, module, enum.name, True))
+        while stack:
+            parent_name, parent_path, msg = stack.pop()
+            full_name = parent_name + "." + msg.name
+            class_path = parent_path + msg.name
+            add(full_name, Symbol(pf.name, module, class_path, False))
+            for enum in msg.enum_type:
+                add(full_name + "." + enum.name, Symbol(pf.name, module, class_path + "." + enum.name, True))
+            stack.extend((full_name, class_path + ".", nested) for nested in reversed(msg.nested_type))
+
+    def file_symbols(self, file_name: str) -> List[Tuple[str, Symbol]]:
+        """Returns symbols defined in the file in order of their definition"""
+        return [(full_name, self._symbols[full_name]) for full_name in self._files.get(file_name, ())]
+
+    def dependency_closure(self, file_name: str) -> List[str]:
+        """Returns names of all files imported by the file directly or through other files, sorted by name"""
+        seen = set()
+        stack = list(self._dependencies.get(file_name, ()))
+        while stack:
+            dependency = stack.pop()
+            if dependency not in seen:
+                seen.add(dependency)
+                stack.extend(self._dependencies.get(dependency, ()))
+        return sorted(seen)
+
+    def get(self, full_name: str) -> Optional[Symbol]:
+        symbol = self._symbols.get(full_name)
+        if symbol is None:
+            return WELL_KNOWN_TYPES.get(full_name)
+        return symbol
+
+    def __contains__(self, full_name: str) -> bool:
+        return full_name in self._symbols or full_name in WELL_KNOWN_TYPES
+
+    def __len__(self) -> int:
+        return len(self._symbols)
@@ -0,0 +1,142 @@
+# Tracing of phases of plugin runs in Chrome trace-event format (chrome://tracing, https://ui.perfetto.dev).
+# Spans of a run are written into a file given by `trace` parameter or `PROTOC_GEN_PYTHON_TYPINGS_TRACE`
+# environment variable, `{pid}` in the path is replaced by the process id, so every run of a build has its own
+# file. Timestamps are wall clock times, so files of all runs are merged into one trace by
+# `python -m stubs_generator.tracing --out merged.json FILE...`. The module is imported by the daemon client,
+# so it must not import `google.protobuf`, and modules needed only by traced runs are imported when they are used.
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+from stubs_generator.profiling import request_parameter, write_diagnostic
+
+# Environment variable with path of the trace file, used when there is no `trace` parameter
+TRACE_ENV = 'PROTOC_GEN_PYTHON_TYPINGS_TRACE'
+
+# Tracer of the running plugin, spans are recorded only while it is set
+_tracer: Optional['Tracer'] = None
+# Start and end of reading the request, it is read before it is known whether the run is traced
+_read_times = None
+
+
+class Tracer:
+    """Collects spans of a plugin run as complete events (`"ph": "X"`) of this process"""
+    __slots__ = ('_path', '_pid', '_events')
+
+    def __init__(self, path: str, process_name: str):
+        self._pid = os.getpid()
+        self._path = path.replace('{pid}', str(self._pid))
+        self._events: List[dict] = [
+            {'name': 'process_name', 'ph': 'M', 'pid': self._pid, 'tid': 0, 'args': {'name': process_name}},
+        ]
+
+    def add(self, name: str, start: float, end: float, args: Dict[str, str] = None):
+        event = {'name': name, 'ph': 'X', 'pid': self._pid, 'tid': 0,
+                 'ts': round(start * 1e6), 'dur': round((end - start) * 1e6)}
+        if args:
+            event['args'] = args
+        self._events.append(event)
+
+    def write(self):
+        """Writes the trace, a file which cannot be written is reported on stderr (see `write_diagnostic`)"""
+        write_diagnostic(self._path, 'trace', self._write)
+
+    def _write(self, path: str):
+        import json
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self._events, 'displayTimeUnit': 'ms'}, f)
+
+
+class _Span:
+    __slots__ = ('_tracer', '_name', '_args', '_start')
+
+    def __init__(self, tracer: Tracer, name: str, args: Dict[str, str]):
+        self._tracer = tracer
+        self._name = name
+        self._args = args
+
+    def __enter__(self):
+        self._start = time.time()
+
+    def __exit__(self, *exc_info):
+        self._tracer.add(self._name, self._start, time.time(), self._args)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str, **args: str):
+    """Returns context manager recording span of a phase with `args`, it does nothing when the run is not traced"""
+    if _tracer is None:
+        return _NO_SPAN
+    return _Span(_tracer, name, args)
+
+
+def read_request() -> bytes:
+    """Reads serialized request from stdin, time of reading is traced when tracing is started later"""
+    global _read_times
+    start = time.time()
+    data = sys.stdin.buffer.read()
+    _read_times = start, time.time()
+    return data
+
+
+def tracing_requested(data: bytes) -> bool:
+    """Returns whether run of the serialized request should be traced, such requests are not sent to the daemon"""
+    if os.environ.get(TRACE_ENV):
+        return True
+    return any(option.partition('=')[0].strip() == 'trace' for option in request_parameter(data).split(','))
+
+
+def start_tracing(options: Dict[str, str], process_name: str):
+    """Starts tracing of the run when it is requested by plugin parameters or the environment"""
+    global _tracer
+    path = options.get('trace') or os.environ.get(TRACE_ENV)
+    if not path:
+        return
+    _tracer = Tracer(path, process_name)
+    if _read_times is not None:
+        _tracer.add('read request', *_read_times)
+
+
+def stop_tracing():
+    """Stops tracing of the run and writes its trace"""
+    global _tracer
+    if _tracer is not None:
+        _tracer.write()
+        _tracer = None
+
+
+def merge(paths: List[str], out: str):
+    """Merges trace files of plugin runs into one trace"""
+    import json
+    events = []
+    for path in paths:
+        with open(path) as f:
+            events.extend(json.load(f)['traceEvents'])
+    with open(out, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Merges traces of protoc-gen-python_*typings runs into one trace")
+    parser.add_argument('traces', nargs='+', help="trace files written by plugin runs")
+    parser.add_argument('--out', '-o', required=True, help="merged trace file")
+    args = parser.parse_args()
+    merge(args.traces, args.out)
+
+
+if __name__ == '__main__':
+    main()
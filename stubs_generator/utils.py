@@ -1,31 +1,51 @@
-from itertools import chain
-from typing import List, Union, Dict, Iterable
+from operator import attrgetter
+from typing import Dict, Iterable, Iterator, List, Sequence, Set, Tuple, Union
 
 from google.protobuf.descriptor import FieldDescriptor
+from google.protobuf.descriptor_pb2 import FileDescriptorProto
 
 from stubs_generator.base import CodePart, FieldType
+from stubs_generator.comments import CommentIndex
 from stubs_generator.fields import MessageType, OneOfGroupType, SimpleType
 from stubs_generator.messages import Import
+from stubs_generator.symbols import SymbolTable
 
 
-def after_every(items: List[CodePart], *parts: CodePart) -> List[CodePart]:
+def after_every(items: Sequence[CodePart], parts: Iterable[CodePart]) -> Iterator[CodePart]:
     """Inserts after every part a list of items"""
-    return list(chain(*[[p, *items] for p in parts]))
+    for p in parts:
+        yield p
+        yield from items
 
 
-def before_every(items: List[CodePart], *parts: CodePart) -> List[CodePart]:
+def before_every(items: Sequence[CodePart], parts: Iterable[CodePart]) -> Iterator[CodePart]:
     """Inserts before every part a list of items"""
-    return list(chain(*[[*items, p] for p in parts]))
+    for p in parts:
+        yield from items
+        yield p
 
 
-def after_if_not_empty(items: List[CodePart], *parts: CodePart, _else: List[CodePart] = list()) -> List[CodePart]:
+def after_if_not_empty(items: Sequence[CodePart], parts: Iterable[CodePart],
+                       _else: Sequence[CodePart] = ()) -> Iterator[CodePart]:
     """Inserts after all parts a list of items if there are any parts"""
-    return [*parts, *items] if parts else _else
+    empty = True
+    for p in parts:
+        empty = False
+        yield p
+    yield from _else if empty else items
 
 
-def before_if_not_empty(items: List[CodePart], *parts: CodePart, _else: List[CodePart] = list()) -> List[CodePart]:
+def before_if_not_empty(items: Sequence[CodePart], parts: Iterable[CodePart],
+                        _else: Sequence[CodePart] = ()) -> Iterator[CodePart]:
     """Inserts before all parts a list of items if there are any parts"""
-    return [*items, *parts] if parts else _else
+    parts = iter(parts)
+    first = next(parts, None)
+    if first is None:
+        yield from _else
+        return
+    yield from items
+    yield first
+    yield from parts
 
 
 GRPC_TYPE_TO_PYTHON_TYPE = {
@@ -49,67 +69,141 @@ GRPC_TYPE_TO_PYTHON_TYPE = {
     FieldDescriptor.TYPE_MESSAGE: 'Message',
 }
 
+# Field types are immutable, so scalar types are shared by all fields (flyweights), keyed by type and repeated flag
+_SIMPLE_TYPES: Dict[Tuple[int, bool], SimpleType] = {
+    (type, repeated): SimpleType(python_type, repeated=repeated)
+    for type, python_type in GRPC_TYPE_TO_PYTHON_TYPE.items()
+    for repeated in (False, True)
+}
+
 
 class ImportPool(CodePart):
+    """Imports of a stub file keyed by module path, names imported from the same module are merged together"""
+    __slots__ = ('_from_imports', '_module_imports', '_names')
     TEMPLATE = """{imports}"""
 
     def __init__(self):
-        self._imports: List[Import] = []
+        # module path -> imported names, dictionary keeps them unique and in order they were added
+        self._from_imports: Dict[str, Dict[str, None]] = {}
+        self._module_imports: Set[str] = set()
+        # name bound in the stub -> module it is imported from ("" for names defined by the stub itself)
+        self._names: Dict[str, str] = {}
 
     def add(self, _im: Import):
-        if _im not in self:
-            self._imports.append(_im)
+        if _im.items:
+            names = self._from_imports.get(_im.path)
+            if names is None:
+                names = self._from_imports[_im.path] = {}
+            names.update(dict.fromkeys(_im.items))
+            for item in _im.items:
+                if item != '*':
+                    self._names.setdefault(item.split(' as ')[-1], _im.path)
+        else:
+            self._module_imports.add(_im.path)
+
+    def reserve(self, names: Iterable[str]):
+        """Marks names defined by the stub itself, imported names never shadow them"""
+        for name in names:
+            self._names.setdefault(name, "")
+
+    def import_name(self, path: str, name: str) -> str:
+        """Imports the name from the module and returns the name it is visible under in the stub, it is aliased
+           when the stub already binds the same name to something else
+        """
+        if self._names.get(name, path) == path:
+            self.add(Import(path, [name]))
+            return name
+        alias = "{}_{}".format(path.replace('.', '_'), name)
+        self.add(Import(path, ["{} as {}".format(name, alias)]))
+        return alias
 
     def __contains__(self, item: Union[Import, str]) -> bool:
-        return any(item in im for im in self._imports)
+        if isinstance(item, str):
+            return item in self._module_imports or item in self._from_imports
+        if not item.items:
+            return item.path in self._module_imports
+        names = self._from_imports.get(item.path, {})
+        return all(name in names for name in item.items)
+
+    def _imports(self) -> List[Import]:
+        imports = [Import(path) for path in self._module_imports]
+        for path, names in self._from_imports.items():
+            if '*' in names:
+                # star import can not be combined with other names
+                imports.append(Import(path, ['*']))
+                names = [name for name in names if name != '*']
+            if names:
+                imports.append(Import(path, list(names)))
+        return imports
 
     def generate(self, indentation: int, indentation_str: str) -> str:
         return self.TEMPLATE.format(
             imports="".join([im.generate(indentation, indentation_str)
-                             for im in sorted(self._imports)]),
+                             for im in sorted(self._imports(), key=attrgetter('sort_key'))]),
         )
 
 
 def decode_type(type: int = FieldDescriptor.TYPE_MESSAGE, name: str = None, repeated: bool = False,
-                import_pool: ImportPool = None, proto_name: str = "", parents: List[str] = None) -> FieldType:
-    """Decodes a type of field and creates appropriate descriptor for it"""
+                import_pool: ImportPool = None, module: str = "", parents: List[str] = None,
+                symbols: SymbolTable = None, scope: str = None) -> FieldType:
+    """Decodes a type of field and creates appropriate descriptor for it
+
+       Referenced messages are looked up in `symbols`, those which are not defined in `module` (python module
+       of the stub being generated) are imported by name into `import_pool`. `scope` is class path of the message
+       being generated followed by a dot, it is joined from `parents` when it is not given.
+    """
     if type == FieldDescriptor.TYPE_MESSAGE:
         assert name is not None
-        if import_pool:
-            *import_path, cls_name = name.split(".")[1:]
-            if not parents or ".".join(import_path) not in ".".join(parents):
-                if not import_path:
-                    import_path = "{}_pb2".format(proto_name).split('/')
-                import_pool.add(Import(".".join(import_path), ['*']))
-                return MessageType(cls_name, repeated=repeated)
-        return MessageType(name.split(".")[-1], repeated=repeated)
+        symbol = symbols.get(name) if symbols is not None else None
+        if symbol is None:
+            return MessageType(name.split(".")[-1], repeated=repeated)
+        if symbol.module != module:
+            if import_pool is None:
+                return MessageType(symbol.class_path, repeated=repeated)
+            # only the top level class is imported, nested ones are reached through it
+            top_level, _, nested = symbol.class_path.partition(".")
+            local_name = import_pool.import_name(symbol.module, top_level)
+            return MessageType(local_name + "." + nested if nested else local_name, repeated=repeated)
+        if scope is None:
+            scope = ".".join(parents) + "." if parents else ""
+        if scope and symbol.class_path.startswith(scope):
+            # nested in the message being generated, so it is visible in its class body
+            return MessageType(symbol.class_path[len(scope):], repeated=repeated)
+        return MessageType(symbol.class_path, repeated=repeated)
     if type == FieldDescriptor.TYPE_GROUP:
         return OneOfGroupType()  # FIXME: TYPE_GROUP was not used in oneof construction
     try:
-        return SimpleType(GRPC_TYPE_TO_PYTHON_TYPE[type], repeated=repeated)
+        return _SIMPLE_TYPES[type, bool(repeated)]
     except Exception as ex:
         raise Exception(str(type)) from ex
 
 
-def get_comments(pf) -> Dict[str, List[str]]:
+class TypeDecoder:
+    """Decodes field types of a single stub, identical types are resolved and rendered only once
+       and their instance is shared by all fields and methods using them
+
+       The decoder must not be shared by stubs, types of one stub are imported into its `import_pool`.
+    """
+    __slots__ = ('_symbols', '_module', '_import_pool', '_types')
+
+    def __init__(self, symbols: SymbolTable, module: str, import_pool: ImportPool):
+        self._symbols = symbols
+        self._module = module
+        self._import_pool = import_pool
+        # (type, type name, repeated, scope) -> decoded type
+        self._types: Dict[Tuple[int, str, bool, str], FieldType] = {}
+
+    def decode(self, type: int = FieldDescriptor.TYPE_MESSAGE, name: str = None, repeated: bool = False,
+               scope: str = "") -> FieldType:
+        """Decodes type of field of message with class path `scope` (followed by a dot)"""
+        key = (type, name, repeated, scope)
+        field_type = self._types.get(key)
+        if field_type is None:
+            field_type = self._types[key] = decode_type(type, name, repeated, self._import_pool, self._module,
+                                                        symbols=self._symbols, scope=scope)
+        return field_type
+
+
+def get_comments(pf: FileDescriptorProto) -> Dict[str, List[str]]:
     """Retrieves comments from proto file and creates a dictionary symbol which comment was aimed at"""
-    def _get_inner():
-        i = 0
-        for location in pf.source_code_info.location:
-            if location.trailing_comments:
-                pf_p = pf
-                cls_path = []
-                for path in location.path:
-                    if hasattr(pf_p, "field") or hasattr(pf_p, "method"):
-                        cls_path.append(pf_p.name)
-                    if isinstance(pf_p, Iterable):
-                        pf_p = list(pf_p)[path]
-                    else:
-                        pf_p = getattr(pf_p, pf_p.DESCRIPTOR.fields_by_number[path].name)
-                # cls_path - parent object names, pf_p - message from decoder
-                # location.trailing_comments - at the end of the line
-                yield ".".join(cls_path + [pf_p.name]), location.trailing_comments.splitlines()
-            i += 1
-
-    # return dict()
-    return dict(_get_inner())
+    return CommentIndex(pf).trailing
@@ -0,0 +1,127 @@
+from typing import BinaryIO, Container, Iterator, Optional, Tuple
+
+# Wire types of protobuf encoding
+VARINT = 0
+FIXED64 = 1
+LENGTH_DELIMITED = 2
+FIXED32 = 5
+
+
+def encode_varint(value: int) -> bytes:
+    if value < 0:
+        # negative int32/int64 values are encoded as 64-bit two's complement
+        value += 1 << 64
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def decode_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Decodes varint starting at `pos`, returns its value and position after it"""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def encode_tag(number: int, wire_type: int) -> bytes:
+    return encode_varint(number << 3 | wire_type)
+
+
+def encode_length_delimited(number: int, payload: bytes) -> bytes:
+    return encode_tag(number, LENGTH_DELIMITED) + encode_varint(len(payload)) + payload
+
+
+def iter_fields(data: bytes, start: int = 0, end: int = None) -> Iterator[Tuple[int, int, object]]:
+    """Yields field number, wire type and value of every field of an encoded message, value of length delimited
+       field is a `memoryview` slice of `data`, so nested messages are not copied
+    """
+    view = memoryview(data)
+    pos = start
+    end = len(data) if end is None else end
+    while pos < end:
+        tag, pos = decode_varint(view, pos)
+        number, wire_type = tag >> 3, tag & 7
+        if wire_type == VARINT:
+            value, pos = decode_varint(view, pos)
+        elif wire_type == LENGTH_DELIMITED:
+            size, pos = decode_varint(view, pos)
+            value = view[pos:pos + size]
+            pos += size
+        elif wire_type == FIXED64:
+            value = view[pos:pos + 8]
+            pos += 8
+        elif wire_type == FIXED32:
+            value = view[pos:pos + 4]
+            pos += 4
+        else:
+            raise ValueError("unsupported wire type {} of field {}".format(wire_type, number))
+        yield number, wire_type, value
+
+
+def scan_length_delimited(data: bytes, numbers: Container[int], start: int = 0,
+                          end: int = None) -> Iterator[Tuple[int, int, int]]:
+    """Yields field number, start and end of every length delimited field with one of `numbers`,
+       other fields are skipped without being decoded, so it is a fast way to pick a few fields of big message
+    """
+    pos = start
+    end = len(data) if end is None else end
+    while pos < end:
+        # tags and sizes are mostly single byte varints
+        tag = data[pos]
+        pos += 1
+        if tag & 0x80:
+            tag, pos = decode_varint(data, pos - 1)
+        wire_type = tag & 7
+        if wire_type == LENGTH_DELIMITED:
+            size = data[pos]
+            pos += 1
+            if size & 0x80:
+                size, pos = decode_varint(data, pos - 1)
+            if tag >> 3 in numbers:
+                yield tag >> 3, pos, pos + size
+            pos += size
+        elif wire_type == VARINT:
+            while data[pos] & 0x80:
+                pos += 1
+            pos += 1
+        elif wire_type == FIXED64:
+            pos += 8
+        elif wire_type == FIXED32:
+            pos += 4
+        else:
+            raise ValueError("unsupported wire type {} of field {}".format(wire_type, tag >> 3))
+
+
+def read_delimited(stream: BinaryIO) -> Optional[bytes]:
+    """Reads message prefixed by its varint encoded size, returns None at the end of the stream"""
+    size = 0
+    shift = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            if shift:
+                raise EOFError("stream ended inside of message size")
+            return None
+        size |= (byte[0] & 0x7f) << shift
+        if not byte[0] & 0x80:
+            break
+        shift += 7
+    data = stream.read(size)
+    if len(data) != size:
+        raise EOFError("stream ended inside of message")
+    return data
+
+
+def write_delimited(stream: BinaryIO, data: bytes):
+    """Writes message prefixed by its varint encoded size"""
+    stream.write(encode_varint(len(data)))
+    stream.write(data)
@@ -0,0 +1,220 @@
+import argparse
+import os
+import sys
+import traceback
+from functools import lru_cache
+from typing import BinaryIO, Dict, List, NamedTuple, Tuple
+
+from google.protobuf.descriptor_pb2 import FileDescriptorProto, FileDescriptorSet
+
+from stubs_generator.cache import MemoryStubCache, cache_key
+from stubs_generator.output import write_stub
+from stubs_generator.plugin import PluginError, generate_file, get_targets, parse_parameter
+from stubs_generator.symbols import SymbolTable
+from stubs_generator.utils import get_comments
+from stubs_generator.wire import (LENGTH_DELIMITED, VARINT, encode_length_delimited, encode_tag, encode_varint,
+                                  iter_fields, read_delimited, write_delimited)
+
+# Key of a descriptor set: its absolute path and digest of its content
+DescriptorSetKey = Tuple[str, bytes]
+
+
+class WorkRequest(NamedTuple):
+    """Request of Bazel persistent worker protocol (`WorkRequest` in `worker_protocol.proto`)"""
+    arguments: List[str]
+    inputs: Dict[str, bytes]
+    request_id: int
+    cancel: bool
+
+
+def decode_work_request(data: bytes) -> WorkRequest:
+    arguments = []
+    inputs = {}
+    request_id = 0
+    cancel = False
+    for number, wire_type, value in iter_fields(data):
+        if number == 1 and wire_type == LENGTH_DELIMITED:
+            arguments.append(bytes(value).decode('utf-8'))
+        elif number == 2 and wire_type == LENGTH_DELIMITED:
+            path, digest = "", b""
+            for input_number, input_wire_type, input_value in iter_fields(value):
+                if input_number == 1 and input_wire_type == LENGTH_DELIMITED:
+                    path = bytes(input_value).decode('utf-8')
+                elif input_number == 2 and input_wire_type == LENGTH_DELIMITED:
+                    digest = bytes(input_value)
+            inputs[path] = digest
+        elif number == 3 and wire_type == VARINT:
+            request_id = value
+        elif number == 4 and wire_type == VARINT:
+            cancel = bool(value)
+    return WorkRequest(arguments, inputs, request_id, cancel)
+
+
+def encode_work_request(arguments: List[str], inputs: Dict[str, bytes] = None, request_id: int = 0) -> bytes:
+    data = b"".join(encode_length_delimited(1, argument.encode('utf-8')) for argument in arguments)
+    for path, digest in (inputs or {}).items():
+        data += encode_length_delimited(2, encode_length_delimited(1, path.encode('utf-8'))
+                                        + encode_length_delimited(2, digest))
+    if request_id:
+        data += encode_tag(3, VARINT) + encode_varint(request_id)
+    return data
+
+
+def encode_work_response(exit_code: int, output: str, request_id: int) -> bytes:
+    """Encodes response of Bazel persistent worker protocol (`WorkResponse` in `worker_protocol.proto`)"""
+    data = b""
+    if exit_code:
+        data += encode_tag(1, VARINT) + encode_varint(exit_code)
+    if output:
+        data += encode_length_delimited(2, output.encode('utf-8'))
+    if request_id:
+        data += encode_tag(3, VARINT) + encode_varint(request_id)
+    return data
+
+
+def decode_work_response(data: bytes) -> Tuple[int, str, int]:
+    """Decodes exit code, output and request id of a work response"""
+    exit_code, output, request_id = 0, "", 0
+    for number, wire_type, value in iter_fields(data):
+        if number == 1 and wire_type == VARINT:
+            exit_code = value
+        elif number == 2 and wire_type == LENGTH_DELIMITED:
+            output = bytes(value).decode('utf-8')
+        elif number == 3 and wire_type == VARINT:
+            request_id = value
+    return exit_code, output, request_id
+
+
+class _ArgumentParser(argparse.ArgumentParser):
+    def error(self, message: str):
+        raise PluginError(message)
+
+
+def _argument_parser() -> argparse.ArgumentParser:
+    parser = _ArgumentParser(prog="python -m stubs_generator.worker", fromfile_prefix_chars='@',
+                             description="Generates stubs from descriptor sets, as Bazel persistent worker "
+                                         "with --persistent_worker")
+    parser.add_argument('--persistent_worker', action='store_true',
+                        help="read work requests from stdin and write work responses to stdout")
+    parser.add_argument('--descriptor_set_in', action='append', default=[],
+                        help="descriptor set with the files and their imports (including source info), "
+                             "can be repeated or separated by colon")
+    parser.add_argument('--out', default='.', help="output directory")
+    parser.add_argument('--parameter', default='', help="plugin parameter, e.g. target=messages")
+    parser.add_argument('files', nargs='+', help="names of proto files to generate stubs for")
+    return parser
+
+
+def parse_arguments(arguments: List[str]) -> argparse.Namespace:
+    """Parses arguments of a work request"""
+    return _argument_parser().parse_args(arguments)
+
+
+def _digest(path: str, inputs: Dict[str, bytes]) -> bytes:
+    """Digest of the file provided by Bazel, or its modification time and size when there is none"""
+    digest = inputs.get(path)
+    if digest:
+        return digest
+    stat = os.stat(path)
+    return "{}:{}".format(stat.st_mtime_ns, stat.st_size).encode()
+
+
+@lru_cache(maxsize=256)
+def _load_descriptor_set(key: DescriptorSetKey) -> Tuple[FileDescriptorProto, ...]:
+    with open(key[0], 'rb') as f:
+        return tuple(FileDescriptorSet.FromString(f.read()).file)
+
+
+@lru_cache(maxsize=32)
+def _symbol_table(keys: Tuple[DescriptorSetKey, ...]) -> SymbolTable:
+    symbols = SymbolTable()
+    for key in keys:
+        for proto_file in _load_descriptor_set(key):
+            symbols.add_file(proto_file)
+    return symbols
+
+
+@lru_cache(maxsize=4096)
+def _comments(key: DescriptorSetKey, index: int) -> Dict[str, List[str]]:
+    return get_comments(_load_descriptor_set(key)[index])
+
+
+class Worker:
+    """Generates stubs for work requests in a long living process
+
+       Parsed descriptor sets, symbol tables and comments are cached by digest of the descriptor sets and
+       rendered stubs by hash of their inputs, so they are reused by following requests.
+    """
+
+    def __init__(self):
+        self._rendered = MemoryStubCache()
+
+    def run(self, arguments: List[str], inputs: Dict[str, bytes] = None):
+        inputs = inputs or {}
+        args = parse_arguments(arguments)
+        targets = get_targets(parse_parameter(args.parameter), 'both')
+
+        keys = tuple((os.path.abspath(path), _digest(path, inputs))
+                     for paths in args.descriptor_set_in for path in paths.split(':') if path)
+        files: Dict[str, Tuple[DescriptorSetKey, int]] = {}
+        for key in keys:
+            for index, proto_file in enumerate(_load_descriptor_set(key)):
+                files.setdefault(proto_file.name, (key, index))
+        symbols = _symbol_table(keys)
+
+        for name in args.files:
+            if name not in files:
+                raise PluginError("{} is not in any of descriptor sets".format(name))
+            key, index = files[name]
+            proto_file = _load_descriptor_set(key)[index]
+            stubs_key = cache_key(proto_file, symbols, targets)
+            stubs = self._rendered.get(stubs_key)
+            if stubs is None:
+                stubs = generate_file(proto_file, symbols, targets, _comments(key, index))
+                self._rendered.put(stubs_key, stubs)
+            for stub_name, content in stubs:
+                write_stub(args.out, stub_name, content)
+        self._rendered.evict()
+
+    def handle(self, request: WorkRequest) -> Tuple[int, str]:
+        """Handles work request, returns its exit code and output"""
+        try:
+            self.run(request.arguments, request.inputs)
+        except PluginError as ex:
+            return 1, "error: {}\n".format(ex)
+        except Exception:
+            return 1, traceback.format_exc()
+        return 0, ""
+
+
+def serve(stdin: BinaryIO, stdout: BinaryIO):
+    """Handles length delimited work requests from `stdin` until it is closed"""
+    worker = Worker()
+    while True:
+        data = read_delimited(stdin)
+        if data is None:
+            return
+        request = decode_work_request(data)
+        if request.cancel:
+            # requests are handled one by one, so the request was already answered
+            continue
+        exit_code, output = worker.handle(request)
+        write_delimited(stdout, encode_work_response(exit_code, output, request.request_id))
+        stdout.flush()
+
+
+def main(argv: List[str] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if '--persistent_worker' in argv:
+        stdout = sys.stdout.buffer
+        # stdout belongs to the protocol, anything printed goes to the log
+        sys.stdout = sys.stderr
+        serve(sys.stdin.buffer, stdout)
+        return
+    exit_code, output = Worker().handle(WorkRequest(argv, {}, 0, False))
+    sys.stderr.write(output)
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
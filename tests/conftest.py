@@ -0,0 +1,28 @@
+import io
+import sys
+from typing import Callable
+
+import pytest
+from google.protobuf.compiler import plugin_pb2
+
+from benchmarks.synthetic import make_request
+from stubs_generator import plugin
+
+
+@pytest.fixture
+def plugin_request() -> Callable[..., plugin_pb2.CodeGeneratorRequest]:
+    """Builds synthetic request with the parameter, its files import each other and have services"""
+    def build(parameter: str = "") -> plugin_pb2.CodeGeneratorRequest:
+        return make_request(3, 5, 4, parameter)
+    return build
+
+
+@pytest.fixture
+def run_main(monkeypatch, plugin_request) -> Callable[[str], plugin_pb2.CodeGeneratorResponse]:
+    """Runs the plugin on request of `plugin_request` with the parameter, returns the response written to stdout"""
+    def run(parameter: str) -> plugin_pb2.CodeGeneratorResponse:
+        stdout = io.TextIOWrapper(io.BytesIO())
+        monkeypatch.setattr(sys, 'stdout', stdout)
+        plugin.main('both', plugin_request(parameter).SerializeToString())
+        return plugin_pb2.CodeGeneratorResponse.FromString(stdout.buffer.getvalue())
+    return run
@@ -0,0 +1,23 @@
+import pytest
+
+from stubs_generator.base import Template
+
+TEMPLATES = [
+    "",
+    "plain text",
+    "{indent}class {name}({parent}):\n",
+    "{indent}{name} = {name}  # {{escaped}} {value}",
+]
+
+
+@pytest.mark.parametrize('template', TEMPLATES)
+def test_template_renders_like_str_format(template):
+    arguments = {'indent': "    ", 'name': "Message", 'parent': "Base", 'value': 1, 'unused': "x"}
+    assert Template(template).format(**arguments) == str.format(template, **arguments)
+
+
+def test_template_requires_all_fields():
+    with pytest.raises(KeyError):
+        str.format("{indent}x {name}", indent="  ")
+    with pytest.raises(TypeError):
+        Template("{indent}x {name}").format(indent="  ")
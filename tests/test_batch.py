@@ -0,0 +1,36 @@
+import os
+
+import pytest
+from google.protobuf.descriptor_pb2 import FileDescriptorSet
+
+from benchmarks.synthetic import make_request
+from stubs_generator import batch
+
+
+@pytest.fixture
+def descriptor_set(tmp_path) -> str:
+    path = tmp_path / 'tree.bin'
+    path.write_bytes(FileDescriptorSet(file=make_request(3, 2, 2).proto_file).SerializeToString())
+    return str(path)
+
+
+def generated(out) -> set:
+    return {os.path.relpath(os.path.join(root, name), out) for root, _, names in os.walk(out) for name in names}
+
+
+def test_descriptor_set_requires_selection(descriptor_set, tmp_path):
+    with pytest.raises(SystemExit):
+        batch.main([descriptor_set, '--out', str(tmp_path / 'out'), '--jobs', '1'])
+    assert not os.path.exists(tmp_path / 'out')
+
+
+def test_selected_files_only(descriptor_set, tmp_path):
+    out = tmp_path / 'out'
+    batch.main([descriptor_set, '--out', str(out), '--jobs', '1', '-f', 'synthetic/file2.proto'])
+    assert generated(out) == {'synthetic/file2_pb2.pyi', 'synthetic/file2_pb2_grpc.pyi'}
+
+
+def test_all_files(descriptor_set, tmp_path):
+    out = tmp_path / 'out'
+    batch.main([descriptor_set, '--out', str(out), '--jobs', '1', '--all', '--target', 'messages'])
+    assert generated(out) == {'synthetic/file{}_pb2.pyi'.format(i) for i in range(3)}
@@ -0,0 +1,20 @@
+import os
+import time
+
+from stubs_generator import cache
+
+
+def test_evict_removes_stale_temporary_files(tmp_path):
+    stub_cache = cache.StubCache(str(tmp_path))
+    stub_cache.put('ab' + '0' * 62, [('a_pb2.pyi', "content")])
+    stale = tmp_path / 'ab' / (cache._TEMP_PREFIX + 'stale')
+    fresh = tmp_path / 'ab' / (cache._TEMP_PREFIX + 'fresh')
+    stale.write_text("{")
+    fresh.write_text("{")
+    old = time.time() - cache._TEMP_MAX_AGE - 1
+    os.utime(stale, (old, old))
+
+    stub_cache.evict()
+    # temporary file of a concurrent run is kept until it replaces its entry
+    assert sorted(os.listdir(tmp_path / 'ab')) == sorted([fresh.name, 'ab' + '0' * 62 + '.json'])
+    assert stub_cache.get('ab' + '0' * 62) == [('a_pb2.pyi', "content")]
@@ -0,0 +1,64 @@
+import os
+import socket
+
+from benchmarks.synthetic import make_request
+from stubs_generator import client, plugin
+
+
+def listen(path: str) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    os.chmod(path, 0o600)
+    sock.listen(1)
+    return sock
+
+
+def test_daemon_is_not_used_without_socket(monkeypatch):
+    monkeypatch.delenv(client.SOCKET_ENV, raising=False)
+    assert client.socket_path() is None
+    assert client.request_daemon('both', b"") is None
+
+
+def test_private_socket(tmp_path):
+    os.chmod(str(tmp_path), 0o700)
+    path = str(tmp_path / 'daemon.sock')
+    with listen(path):
+        assert client.is_private_socket(path)
+
+
+def test_socket_in_shared_directory(tmp_path):
+    os.chmod(str(tmp_path), 0o755)
+    path = str(tmp_path / 'daemon.sock')
+    with listen(path):
+        assert not client.is_private_socket(path)
+
+
+def test_socket_accessible_by_others(tmp_path):
+    os.chmod(str(tmp_path), 0o700)
+    path = str(tmp_path / 'daemon.sock')
+    with listen(path):
+        os.chmod(path, 0o666)
+        assert not client.is_private_socket(path)
+
+
+def test_not_a_socket(tmp_path):
+    os.chmod(str(tmp_path), 0o700)
+    path = tmp_path / 'daemon.sock'
+    path.write_bytes(b"")
+    os.chmod(str(path), 0o600)
+    assert not client.is_private_socket(str(path))
+
+
+def test_peer_runs_as_this_user(tmp_path):
+    os.chmod(str(tmp_path), 0o700)
+    path = str(tmp_path / 'daemon.sock')
+    with listen(path), socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        assert client._peer_uid(sock) in (os.getuid(), None)
+
+
+def test_relative_cache_dir_is_resolved_against_client_cwd(tmp_path):
+    data = make_request(2, 3, 1, "cache_dir=.stubcache").SerializeToString()
+    plugin.generate_serialized(data, 'both', str(tmp_path))
+    assert os.listdir(tmp_path / '.stubcache')
+    assert not os.path.exists('.stubcache')
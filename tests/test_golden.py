@@ -0,0 +1,31 @@
+import os
+
+import pytest
+from google.protobuf.compiler import plugin_pb2
+
+from stubs_generator.plugin import generate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Request recorded from protoc generating `example/application.proto`
+REQUEST = os.path.join(ROOT, 'benchmarks', 'fixtures', 'application.request.bin')
+
+
+def read_request() -> plugin_pb2.CodeGeneratorRequest:
+    with open(REQUEST, 'rb') as f:
+        return plugin_pb2.CodeGeneratorRequest.FromString(f.read())
+
+
+@pytest.mark.parametrize('target', ['messages', 'grpc'])
+def test_example_stubs(target):
+    response = generate(read_request(), target)
+    assert not response.error
+    assert response.file
+    for generated in response.file:
+        with open(os.path.join(ROOT, generated.name), encoding='utf-8') as f:
+            assert generated.content == f.read(), generated.name
+
+
+def test_example_both():
+    response = generate(read_request(), 'both')
+    assert [generated.name for generated in response.file] == ['example/application_pb2.pyi',
+                                                              'example/application_pb2_grpc.pyi']
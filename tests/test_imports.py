@@ -0,0 +1,79 @@
+from typing import Dict
+
+import pytest
+from google.protobuf.compiler import plugin_pb2
+from google.protobuf.descriptor_pb2 import FieldDescriptorProto, FileDescriptorProto
+
+from stubs_generator.messages import Import
+from stubs_generator.plugin import generate
+from stubs_generator.utils import ImportPool
+
+
+def proto_file(name: str, package: str, *messages: str, dependency=()) -> FileDescriptorProto:
+    pf = FileDescriptorProto(name=name, package=package, syntax="proto3", dependency=list(dependency))
+    for message in messages:
+        pf.message_type.add(name=message)
+    return pf
+
+
+@pytest.fixture(scope='module')
+def stubs() -> Dict[str, str]:
+    # both packages define `Item`, so does the generated file
+    first = proto_file("a/common.proto", "a.common", "Item")
+    first.message_type[0].nested_type.add(name="Part")
+    second = proto_file("b/common.proto", "b.common", "Item", "StoreStub")
+    app = proto_file("app/app.proto", "app", "Item", "Holder", dependency=[first.name, second.name])
+    for number, type_name in enumerate([".a.common.Item", ".b.common.Item", ".a.common.Item.Part", ".app.Item"], 1):
+        app.message_type[1].field.add(name="field{}".format(number), number=number, type_name=type_name,
+                                      type=FieldDescriptorProto.TYPE_MESSAGE)
+    service = app.service.add(name="Store")
+    service.method.add(name="Get", input_type=".app.Holder", output_type=".a.common.Item")
+    service.method.add(name="Own", input_type=".app.Item", output_type=".b.common.StoreStub")
+    request = plugin_pb2.CodeGeneratorRequest(file_to_generate=[app.name], proto_file=[first, second, app])
+    response = generate(request, 'both')
+    assert not response.error
+    return {f.name: f.content for f in response.file}
+
+
+def test_same_names_of_two_packages_are_aliased(stubs):
+    content = stubs['app/app_pb2.pyi']
+    assert "from a.common_pb2 import Item as a_common_pb2_Item\n" in content
+    assert "from b.common_pb2 import Item as b_common_pb2_Item\n" in content
+    assert "field1: a_common_pb2_Item = None" in content
+    assert "field2: b_common_pb2_Item = None" in content
+
+
+def test_message_of_the_stub_is_not_shadowed(stubs):
+    content = stubs['app/app_pb2.pyi']
+    assert "\nclass Item(Message):\n" in content
+    assert "field4: Item = None" in content
+    assert "import Item\n" not in content
+
+
+def test_nested_type_is_reached_through_alias(stubs):
+    assert "field3: a_common_pb2_Item.Part = None" in stubs['app/app_pb2.pyi']
+
+
+def test_grpc_stub_imports_its_messages_module(stubs):
+    content = stubs['app/app_pb2_grpc.pyi']
+    # `Item` of the first package is imported first, so the one of the stub's messages module is aliased
+    assert "from a.common_pb2 import Item\n" in content
+    assert "from app.app_pb2 import Holder, Item as app_app_pb2_Item\n" in content
+    assert "request: Holder," in content
+    assert ") -> Item:" in content
+    assert "request: app_app_pb2_Item," in content
+    # names of stub classes generated for services are reserved
+    assert "from b.common_pb2 import StoreStub as b_common_pb2_StoreStub\n" in content
+    assert ") -> b_common_pb2_StoreStub:" in content
+    assert "\nclass StoreStub(object):\n" in content
+
+
+def test_import_name():
+    pool = ImportPool()
+    pool.reserve(["Own"])
+    assert pool.import_name("pkg.a_pb2", "Own") == "pkg_a_pb2_Own"
+    assert pool.import_name("pkg.a_pb2", "Item") == "Item"
+    assert pool.import_name("pkg.a_pb2", "Item") == "Item"
+    assert pool.import_name("pkg.b_pb2", "Item") == "pkg_b_pb2_Item"
+    assert Import("pkg.a_pb2", ["Own as pkg_a_pb2_Own", "Item"]) in pool
+    assert Import("pkg.b_pb2", ["Item as pkg_b_pb2_Item"]) in pool
@@ -0,0 +1,64 @@
+import os
+
+from google.protobuf.compiler import plugin_pb2
+from google.protobuf.descriptor_pb2 import FieldDescriptorProto, FileDescriptorProto
+
+from stubs_generator.modules import scan_source, scan_sources
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module generated by protoc >= 3.20, non-ASCII characters are escaped in the bytes literal
+MODERN_SOURCE = """\
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf.internal import builder as _builder
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile({!r})
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+"""
+
+
+def modern_file() -> FileDescriptorProto:
+    pf = FileDescriptorProto(name="modern/thing.proto", package="modern", syntax="proto3")
+    thing = pf.message_type.add(name="Thing")
+    thing.nested_type.add(name="Part")
+    # default values are not ASCII, so bytes of the descriptor are not either
+    thing.field.add(name="label", number=1, type=FieldDescriptorProto.TYPE_STRING,
+                    label=FieldDescriptorProto.LABEL_OPTIONAL, default_value="žluťoučký")
+    pf.enum_type.add(name="Kind").value.add(name="KIND_UNKNOWN", number=0)
+    return pf
+
+
+def names(pf: FileDescriptorProto):
+    return ([(msg.name, [nested.name for nested in msg.nested_type]) for msg in pf.message_type],
+            [enum.name for enum in pf.enum_type],
+            [(service.name, [method.name for method in service.method]) for service in pf.service])
+
+
+def test_scan_legacy_source():
+    with open(os.path.join(ROOT, 'example', 'application_pb2.py'), encoding='utf-8') as f:
+        scanned = FileDescriptorProto.FromString(scan_source(f.read()))
+    with open(os.path.join(ROOT, 'benchmarks', 'fixtures', 'application.request.bin'), 'rb') as f:
+        request = plugin_pb2.CodeGeneratorRequest.FromString(f.read())
+    compiled = next(pf for pf in request.proto_file if pf.name == 'example/application.proto')
+    assert scanned.name == 'example/application.proto'
+    assert list(scanned.dependency) == list(compiled.dependency)
+    assert names(scanned) == names(compiled)
+    assert [msg.name for msg in scanned.message_type] == ['SimpleMessage']
+
+
+def test_scan_modern_source():
+    pf = modern_file()
+    scanned = FileDescriptorProto.FromString(scan_source(MODERN_SOURCE.format(pf.SerializeToString())))
+    assert scanned == pf
+    assert names(scanned) == ([('Thing', ['Part'])], ['Kind'], [])
+
+
+def test_scan_sources(tmp_path):
+    (tmp_path / 'modern').mkdir()
+    (tmp_path / 'modern' / 'thing_pb2.py').write_text(MODERN_SOURCE.format(modern_file().SerializeToString()),
+                                                      encoding='utf-8')
+    (tmp_path / 'modern' / 'thing_pb2_grpc.py').write_text("import grpc\n", encoding='utf-8')
+    (tmp_path / 'modern' / 'empty_pb2.py').write_text("DESCRIPTOR = None\n", encoding='utf-8')
+    assert list(scan_sources(str(tmp_path))) == [modern_file()]
@@ -0,0 +1,35 @@
+import json
+import os
+
+from stubs_generator.output import write_manifest, write_stub
+
+NAME = 'pkg/sub/a_pb2.pyi'
+
+
+def test_unchanged_stub_is_not_written(tmp_path):
+    assert write_stub(str(tmp_path), NAME, "class A: ...\n")
+    path = tmp_path / NAME
+    # time of the first write is set back, so a new write would surely change it
+    os.utime(path, ns=(1000000000, 1000000000))
+    assert not write_stub(str(tmp_path), NAME, "class A: ...\n")
+    assert os.stat(path).st_mtime_ns == 1000000000
+
+
+def test_changed_stub_of_the_same_size_is_written(tmp_path):
+    write_stub(str(tmp_path), NAME, "class A: ...\n")
+    os.utime(tmp_path / NAME, ns=(1000000000, 1000000000))
+    assert write_stub(str(tmp_path), NAME, "class B: ...\n")
+    assert (tmp_path / NAME).read_text(encoding='utf-8') == "class B: ...\n"
+    assert os.stat(tmp_path / NAME).st_mtime_ns != 1000000000
+
+
+def test_manifest_lists_changed_modules(tmp_path):
+    path = tmp_path / 'changed.json'
+    write_manifest(str(path), [NAME, 'b_pb2_grpc.pyi'], ['c_pb2.pyi'])
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    assert manifest == {
+        'changed': [NAME, 'b_pb2_grpc.pyi'],
+        'unchanged': ['c_pb2.pyi'],
+        'changed_modules': ['pkg.sub.a_pb2', 'b_pb2_grpc'],
+    }
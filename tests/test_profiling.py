@@ -0,0 +1,18 @@
+import pstats
+
+from stubs_generator import plugin
+
+
+def test_profile_directory_is_created(run_main, tmp_path):
+    path = tmp_path / 'profiles' / 'run.prof'
+    run_main("profile={}".format(path))
+    assert pstats.Stats(str(path)).total_calls > 0
+
+
+def test_unwritable_profile_does_not_fail_the_run(plugin_request, run_main, tmp_path, capsys):
+    blocker = tmp_path / 'file'
+    blocker.write_text("")
+    parameter = "profile={}".format(blocker / 'run.prof')
+    response = run_main(parameter)
+    assert response == plugin.generate(plugin_request(parameter), 'both')
+    assert "cannot write profile" in capsys.readouterr().err
@@ -0,0 +1,107 @@
+import os
+
+import pytest
+from google.protobuf.compiler import plugin_pb2
+from google.protobuf.descriptor_pb2 import FieldDescriptorProto, FileDescriptorProto
+
+from stubs_generator.plugin import generate
+from stubs_generator.request import scan_request
+from stubs_generator.symbols import SymbolTable
+from stubs_generator.wire import scan_length_delimited
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       'benchmarks', 'fixtures', 'application.request.bin')
+# longer than 127 bytes, so lengths of the strings and of messages holding them take more bytes of varint
+LONG = "x" * 300
+
+
+def imported_file() -> FileDescriptorProto:
+    pf = FileDescriptorProto(name="deps/common.proto", package="deps.common", syntax="proto3")
+    pf.options.java_package = LONG
+    pf.enum_type.add(name="Color").value.add(name="RED", number=0)
+    outer = pf.message_type.add(name="Outer")
+    outer.field.add(name="id", number=1, type=FieldDescriptorProto.TYPE_STRING, json_name=LONG)
+    outer.enum_type.add(name="Kind").value.add(name="KIND_UNKNOWN", number=0)
+    inner = outer.nested_type.add(name="Inner")
+    inner.enum_type.add(name="Mode").value.add(name="MODE_UNKNOWN", number=0)
+    inner.nested_type.add(name="Deep").field.add(name="value", number=1, type=FieldDescriptorProto.TYPE_INT32)
+    pf.message_type.add(name="Other")
+    pf.service.add(name="CommonService").method.add(name="Get", input_type=".deps.common.Other",
+                                                     output_type=".deps.common.Outer")
+    pf.source_code_info.location.add(path=[4, 0], leading_comments=LONG)
+    return pf
+
+
+def generated_file(name: str, dependency: str) -> FileDescriptorProto:
+    pf = FileDescriptorProto(name=name, package="app", syntax="proto3", dependency=[dependency])
+    msg = pf.message_type.add(name="Message" + os.path.basename(name)[:-6].title())
+    for number, type_name in enumerate([".deps.common.Outer.Inner.Deep", ".deps.common.Outer.Kind",
+                                        ".deps.common.Outer.Inner.Mode", ".deps.common.Color"], 1):
+        field_type = FieldDescriptorProto.TYPE_ENUM if 'Deep' not in type_name else FieldDescriptorProto.TYPE_MESSAGE
+        msg.field.add(name="field{}".format(number), number=number, type=field_type, type_name=type_name)
+    pf.service.add(name="AppService").method.add(name="Run", input_type=".deps.common.Outer.Inner.Deep",
+                                                 output_type="." + pf.package + "." + msg.name)
+    pf.source_code_info.location.add(path=[4, 0], leading_comments=" " + LONG)
+    return pf
+
+
+def synthetic_request() -> bytes:
+    request = plugin_pb2.CodeGeneratorRequest(parameter="target=both")
+    request.compiler_version.major = 3
+    request.proto_file.extend([imported_file(), generated_file("app/first.proto", "deps/common.proto"),
+                               generated_file("app/second.proto", "deps/common.proto")])
+    # only some files are generated, the others are imports
+    request.file_to_generate.append("app/second.proto")
+    return request.SerializeToString()
+
+
+def fixture_request() -> bytes:
+    with open(FIXTURE, 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture(params=[synthetic_request, fixture_request])
+def data(request) -> bytes:
+    return request.param()
+
+
+def test_long_fields_have_multibyte_lengths():
+    data = imported_file().SerializeToString()
+    # options and the first message
+    lengths = [end - start for _, start, end in scan_length_delimited(data, frozenset((4, 8)))]
+    assert lengths[0] > 127 and lengths[-1] > 127
+
+
+def test_scanned_request_has_the_same_symbols(data):
+    full = plugin_pb2.CodeGeneratorRequest.FromString(data)
+    scanned = scan_request(data)
+    assert scanned.file_to_generate == full.file_to_generate
+    assert scanned.parameter == full.parameter
+    assert scanned.compiler_version == full.compiler_version
+    assert [pf.name for pf in scanned.proto_file] == [pf.name for pf in full.proto_file]
+
+    full_symbols, scanned_symbols = SymbolTable(full.proto_file), SymbolTable(scanned.proto_file)
+    assert len(scanned_symbols) == len(full_symbols)
+    for pf in full.proto_file:
+        assert scanned_symbols.file_symbols(pf.name) == full_symbols.file_symbols(pf.name)
+        assert scanned_symbols.dependency_closure(pf.name) == full_symbols.dependency_closure(pf.name)
+
+
+def test_generated_files_are_parsed_completely(data):
+    full = plugin_pb2.CodeGeneratorRequest.FromString(data)
+    scanned = scan_request(data)
+    for scanned_file, full_file in zip(scanned.proto_file, full.proto_file):
+        if full_file.name in full.file_to_generate:
+            assert scanned_file == full_file
+        else:
+            # skipped parts of imported files are not decoded
+            assert not scanned_file.HasField('options') and not scanned_file.HasField('source_code_info')
+            assert [msg.name for msg in scanned_file.message_type] == [msg.name for msg in full_file.message_type]
+            assert [s.name for s in scanned_file.service] == [s.name for s in full_file.service]
+
+
+def test_scanned_request_generates_the_same_response(data):
+    full = plugin_pb2.CodeGeneratorRequest.FromString(data)
+    response = generate(scan_request(data), 'both')
+    assert not response.error
+    assert response == generate(full, 'both')
@@ -0,0 +1,33 @@
+import pytest
+
+from stubs_generator import plugin
+
+
+@pytest.mark.parametrize('target', ['messages', 'grpc', 'both'])
+def test_stream_equals_serialized_response(plugin_request, target):
+    streamed = b"".join(plugin.generate_stream(plugin_request(), target))
+    assert streamed == plugin.generate(plugin_request(), target).SerializeToString()
+
+
+def test_stream_equals_serialized_error(plugin_request):
+    streamed = b"".join(plugin.generate_stream(plugin_request("target=nothing"), 'both'))
+    response = plugin.generate(plugin_request("target=nothing"), 'both')
+    assert response.error
+    assert streamed == response.SerializeToString()
+
+
+def test_stream_with_profile_report(plugin_request, run_main):
+    whole = run_main("profile_report=profile.txt")
+    streamed = run_main("profile_report=profile.txt,stream")
+    # stubs are the same, the report is the last file of both responses, only timings in it differ
+    assert [f.name for f in streamed.file] == [f.name for f in whole.file]
+    assert streamed.file[-1].name == 'profile.txt'
+    assert [f.content for f in streamed.file[:-1]] == [f.content for f in whole.file[:-1]]
+    assert "function calls" in streamed.file[-1].content
+    assert streamed.file[:-1] == plugin.generate(plugin_request(), 'both').file
+
+
+def test_invalid_stream_flag_is_reported(run_main):
+    response = run_main("stream=maybe")
+    assert response.error == "stream must be true or false, got 'maybe'"
+    assert not response.file
@@ -0,0 +1,26 @@
+import json
+
+from benchmarks import suite
+
+
+def write_results(path, wall_time, peak_rss_kib):
+    result = {'fixture': 'application', 'entry_point': 'both', 'mode': 'in-process', 'request_sha256': "0",
+              'wall_time': wall_time, 'peak_rss_kib': peak_rss_kib}
+    with open(path, 'w') as f:
+        json.dump({'results': [result]}, f)
+    return str(path)
+
+
+def test_compare_regression(tmp_path, capsys):
+    baseline = write_results(tmp_path / 'baseline.json', 1.0, 1000)
+    current = write_results(tmp_path / 'current.json', 1.5, 1000)
+    assert not suite.compare(baseline, current, 0.1, 0.1)
+    assert "slower" in capsys.readouterr().out
+
+
+def test_compare_skips_unmeasured_baseline(tmp_path, capsys):
+    baseline = write_results(tmp_path / 'baseline.json', 0.0, None)
+    current = write_results(tmp_path / 'current.json', 1.0, 1000)
+    assert suite.compare(baseline, current, 0.1, 0.1)
+    row = capsys.readouterr().out.splitlines()[1].split()
+    assert row[-3:] == ["-", "-", "ok"]
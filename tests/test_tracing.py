@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from benchmarks.synthetic import make_request
+from stubs_generator import generator, plugin, tracing
+from stubs_generator.generator import generate_pb2_grpc_stub_file, generate_pb2_stub_file
+from stubs_generator.symbols import SymbolTable
+from stubs_generator.utils import ImportPool
+
+
+def test_trace_directory_is_created(run_main, tmp_path):
+    path = tmp_path / 'traces' / 'run.json'
+    run_main("trace={}".format(path))
+    with open(path) as f:
+        names = {event['name'] for event in json.load(f)['traceEvents']}
+    assert {'parse request', 'symbol table', 'render', 'write response'} <= names
+
+
+def test_unwritable_trace_does_not_fail_the_run(plugin_request, run_main, tmp_path, capsys):
+    blocker = tmp_path / 'file'
+    blocker.write_text("")
+    parameter = "trace={}".format(blocker / 'run.json')
+    response = run_main(parameter)
+    assert response == plugin.generate(plugin_request(parameter), 'both')
+    assert "cannot write trace" in capsys.readouterr().err
+    assert tracing._tracer is None
+
+
+@pytest.mark.parametrize('build, module', [
+    (generate_pb2_stub_file, 'synthetic.file0_pb2'),
+    (generate_pb2_grpc_stub_file, 'synthetic.file1_pb2'),
+])
+def test_stub_tree_is_built_before_rendering(monkeypatch, build, module):
+    pools = []
+    monkeypatch.setattr(generator, 'ImportPool', lambda: pools.append(ImportPool()) or pools[-1])
+    request = make_request(2, 5, 4)
+    tree = build(request.proto_file[1], SymbolTable(request.proto_file))
+    # types of the whole tree are resolved by building it, so 'render' spans include only writing of the text
+    imports = pools[0].generate(0, generator.DEFAULT_TAB_STR)
+    assert module in imports
+    tree.generate(0, generator.DEFAULT_TAB_STR)
+    assert pools[0].generate(0, generator.DEFAULT_TAB_STR) == imports
@@ -0,0 +1,43 @@
+import sys
+
+from benchmarks.synthetic import make_nested_proto_file, make_proto_file
+from stubs_generator.generator import generate_pb2_stub_file_content
+from stubs_generator.symbols import SymbolTable
+
+DEPTH = 500
+FIELDS = 100000
+TAB = '    '
+
+
+def generate(proto_file) -> str:
+    return generate_pb2_stub_file_content(proto_file, SymbolTable([proto_file]))
+
+
+def test_deeply_nested_messages():
+    content = generate(make_nested_proto_file(DEPTH))
+    assert content.count("(Message):\n") == DEPTH + 1
+    # every class is nested in the previous one
+    for level in range(DEPTH + 1):
+        assert "\n{}class Level{}(Message):\n".format(TAB * level, level) in content
+    innermost = ".".join("Level{}".format(level) for level in range(DEPTH + 1))
+    assert "def __eq__(self, other_msg: '{}') -> bool: ...".format(innermost) in content
+    # field of a message references the message nested in it relatively to its scope
+    assert "child: Level{} = None".format(DEPTH) in content
+
+
+def test_messages_nested_deeper_than_recursion_limit():
+    depth = sys.getrecursionlimit() + 200
+    content = generate(make_nested_proto_file(depth))
+    assert content.count("(Message):\n") == depth + 1
+    innermost = ".".join("Level{}".format(level) for level in range(depth + 1))
+    assert "\n{}def __eq__(self, other_msg: '{}') -> bool: ...".format(TAB * (depth + 1), innermost) in content
+
+
+def test_message_with_many_fields():
+    content = generate(make_proto_file(1, FIELDS))
+    assert content.count("(Message):\n") == 1
+    assert content.count("\n{}self.field".format(TAB * 2)) == FIELDS
+    assert content.count(":param field") == FIELDS
+    last = FIELDS - 1
+    assert "field{}: int = None".format(last) in content
+    assert "self.field{0} = field{0}".format(last) in content
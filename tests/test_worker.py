@@ -0,0 +1,28 @@
+import os
+import shutil
+
+from benchmarks import replay_worker
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+ARGUMENTS = ['--descriptor_set_in=application.descriptor_set.bin', '--out=out', 'example/application.proto']
+
+
+def test_replay_recorded_requests():
+    assert replay_worker.replay(os.path.join(FIXTURES, 'application.work_requests.bin'))
+
+
+def test_wrong_stubs_are_reported(tmp_path):
+    shutil.copy(os.path.join(FIXTURES, 'application.descriptor_set.bin'), tmp_path)
+    assert replay_worker.check_stubs(ARGUMENTS, str(tmp_path)) == [
+        "example/application_pb2.pyi not written", "example/application_pb2_grpc.pyi not written"]
+
+    stubs = replay_worker.expected_stubs(ARGUMENTS, str(tmp_path))
+    for name, content in stubs.items():
+        os.makedirs(os.path.dirname(tmp_path / 'out' / name), exist_ok=True)
+        (tmp_path / 'out' / name).write_text(content, encoding='utf-8')
+    assert replay_worker.check_stubs(ARGUMENTS, str(tmp_path)) == []
+
+    (tmp_path / 'out' / 'example' / 'application_pb2.pyi').write_text("", encoding='utf-8')
+    (tmp_path / 'out' / 'extra.pyi').write_text("", encoding='utf-8')
+    assert replay_worker.check_stubs(ARGUMENTS, str(tmp_path)) == [
+        "extra.pyi not expected", "example/application_pb2.pyi differs"]